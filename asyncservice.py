@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import threading
+
+from io import BytesIO
+from functools import partial
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+
+from presentationmanager import PresentationManager
+
+logger = logging.getLogger(__name__)
+
+
+def build_deck(template, items, template_slide_index=1, remove_template=False, cancel=None,
+               **manager_options):
+    """
+    Creates slides for every (content, title) pair in `items` from the template slide of the
+    presentation in bytes `template`. Returns the new presentation as bytes.
+    Runs as a single job, so it can be sent to a process pool
+    """
+    manager = PresentationManager(
+        BytesIO(template), template_slide_index=template_slide_index, **manager_options
+    )
+    manager.populate_slides(items, cancel=cancel)
+    return manager.save(remove_template=remove_template)
+
+
+def merge_decks(sources, destination=None, cancel=None):
+    """
+    Copies slides from each (presentation bytes, slide indices) pair in `sources` to the
+    presentation in bytes `destination`, or to a new presentation. No slide indices means all
+    slides. Returns the merged presentation as bytes
+    """
+    dest = PresentationManager(BytesIO(destination) if destination else None)
+    for blob, slides_to_copy in sources:
+        source = PresentationManager(BytesIO(blob), lazy_normalization=True)
+        if dest.total_slides == 0:
+            dest.set_slide_size(source.presentation.slide_height, source.presentation.slide_width)
+        _copy_slides(source, dest, slides_to_copy or range(source.total_slides), cancel)
+    return dest.save()
+
+
+def _copy_slides(source, destination, slides_to_copy, cancel=None):
+    for i in slides_to_copy:
+        if cancel is not None and cancel.is_set():
+            raise CancelledError("Copying slides cancelled")
+        source.duplicate_slide(i, destination)
+
+
+class AsyncPresentationService(object):
+    """
+    Runs PresentationManager work in an executor so it does not block the event loop.
+
+    At most `max_in_flight` jobs run at once: further calls wait for a free slot, which gives
+    callers backpressure. When the awaiting task is cancelled, jobs in a thread executor stop
+    before their next slide. Jobs sent to a process executor cannot be stopped once started.
+    Either way a cancelled job keeps its slot until it has finished running.
+
+    `build_deck` and `merge_decks` take and return presentations as bytes and work with any
+    executor. `load`, `populate`, `copy` and `save` work on PresentationManager objects kept
+    in this process, so they need a thread executor (the default)
+    """
+
+    def __init__(self, executor=None, max_in_flight=4):
+        # None runs jobs in the event loop's default thread pool
+        self.executor = executor
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    @property
+    def _in_process(self):
+        return not isinstance(self.executor, ProcessPoolExecutor)
+
+    async def _run(self, func, *args, **kwargs):
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            cancel = None
+            if self._in_process:
+                cancel = kwargs["cancel"] = threading.Event()
+            future = loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+            try:
+                # Shielded, so cancelling the caller does not lose track of the running job
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if cancel is not None:
+                    # Let the job stop at its next slide
+                    cancel.set()
+                # Keep the slot until the job has actually stopped
+                await _wait_uncancellable(future)
+                raise
+
+    def _require_threads(self, operation):
+        if not self._in_process:
+            raise TypeError(f"{operation} needs a thread executor, use build_deck or merge_decks")
+
+    async def build_deck(self, template, items, template_slide_index=1, remove_template=False,
+                         **manager_options):
+        return await self._run(
+            build_deck, template, items, template_slide_index, remove_template, **manager_options
+        )
+
+    async def merge_decks(self, sources, destination=None):
+        return await self._run(merge_decks, sources, destination)
+
+    async def load(self, data=None, **manager_options):
+        """Returns PresentationManager for presentation in bytes `data`, or a new presentation"""
+        self._require_threads("load")
+        stream = BytesIO(data) if data else None
+        return await self._run(_load, stream, **manager_options)
+
+    async def populate(self, manager, items):
+        self._require_threads("populate")
+        await self._run(manager.populate_slides, items)
+
+    async def copy(self, source, destination, slides_to_copy=()):
+        self._require_threads("copy")
+        await self._run(
+            _copy_slides, source, destination, slides_to_copy or range(source.total_slides)
+        )
+
+    async def save(self, manager, **save_options):
+        """Returns presentation of manager as bytes"""
+        self._require_threads("save")
+        return await self._run(_save, manager, **save_options)
+
+
+async def _wait_uncancellable(future):
+    while not future.done():
+        try:
+            await asyncio.wait([future])
+        except asyncio.CancelledError:
+            pass
+
+
+def _load(stream, cancel=None, **manager_options):
+    return PresentationManager(stream, **manager_options)
+
+
+def _save(manager, cancel=None, **save_options):
+    return manager.save(**save_options)
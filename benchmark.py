@@ -0,0 +1,482 @@
+import os
+import sys
+import json
+import logging
+import time
+import platform
+import argparse
+import tempfile
+import threading
+
+from io import BytesIO
+from contextlib import redirect_stdout
+
+import psutil
+import pptx
+from pptx import Presentation
+from pptx.chart.data import CategoryChartData
+from pptx.enum.chart import XL_CHART_TYPE
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.opc.package import Part
+from pptx.oxml import parse_xml
+from pptx.util import Inches
+
+from metrics import METRICS
+from presentationmanager import PresentationManager
+from utils import write_package
+
+
+def make_template_file(file_path):
+    """Saves a presentation with a cover slide and a title-and-content template slide"""
+    presentation = Presentation()
+    cover = presentation.slides.add_slide(presentation.slide_layouts[0])
+    cover.shapes.title.text = "Cover"
+    template = presentation.slides.add_slide(presentation.slide_layouts[1])
+    template.shapes.title.text = "Template title"
+    template.placeholders[1].text = "Template content"
+    presentation.save(file_path)
+    return file_path
+
+
+def bench_populate_slides(counts=(500, 1000, 2000, 5000), repeat=1, compile_template=False):
+    """
+    Times `PresentationManager.populate_slides` for each number of generated slides in `counts`.
+    Returns list of (slide count, seconds, milliseconds per slide)
+    """
+    content = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 10
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        template_path = make_template_file(os.path.join(tmp_dir, "template.pptx"))
+        for count in counts:
+            items = [(content, f"Slide {i}") for i in range(count)]
+            best = None
+            for _ in range(repeat):
+                manager = PresentationManager(
+                    template_path, template_slide_index=1, compile_template=compile_template
+                )
+                start = time.perf_counter()
+                manager.populate_slides(items)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results.append((count, best, best * 1000 / count))
+    return results
+
+
+def bench_template_copies(count=200, repeat=3):
+    """
+    Times copying one slide of each synthetic kind `count` times with `duplicate_slide` and with
+    `stamp_slide` from its compiled prototype, as `populate_slides` does with `compile_template`.
+    Returns list of (kind, milliseconds per duplicated slide, milliseconds per stamped slide)
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        deck_path = make_synthetic_deck(os.path.join(tmp_dir, "deck.pptx"), slides_per_kind=1)
+        for index, kind in enumerate(SLIDE_KINDS):
+            row = [kind]
+            for method in ("duplicate_slide", "stamp_slide"):
+                best = None
+                for _ in range(repeat):
+                    copy_slide = getattr(PresentationManager(deck_path), method)
+                    # Leaves out normalizing the slide and compiling the prototype
+                    copy_slide(index)
+                    start = time.perf_counter()
+                    for _ in range(count):
+                        copy_slide(index)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                row.append(best * 1000 / count)
+            results.append(tuple(row))
+    return results
+
+
+def make_media_deck(slide_count=50, image_size=(800, 600)):
+    """Returns presentation with `slide_count` slides each holding a noisy JPEG and PNG picture"""
+    from PIL import Image
+
+    presentation = Presentation()
+    layout = presentation.slide_layouts[5]
+    for i in range(slide_count):
+        slide = presentation.slides.add_slide(layout)
+        slide.shapes.title.text = f"Slide {i}"
+        for fmt in ("JPEG", "PNG"):
+            image = Image.merge(
+                "RGB", [Image.effect_noise(image_size, 64 + i % 64) for _ in range(3)]
+            )
+            stream = BytesIO()
+            image.save(stream, fmt)
+            stream.seek(0)
+            slide.shapes.add_picture(stream, 0, 0)
+    return presentation
+
+
+def bench_save(slide_count=50, settings=((None, True), (1, True), (9, True), (None, False))):
+    """
+    Times saving a deck with pictures with python-pptx and with `write_package` for each 
+    (compresslevel, store_compressed) in `settings`. 
+    Returns list of (setting, seconds, size in bytes)
+    """
+    presentation = make_media_deck(slide_count)
+    results = []
+
+    stream = BytesIO()
+    start = time.perf_counter()
+    presentation.save(stream)
+    results.append(("python-pptx", time.perf_counter() - start, stream.tell()))
+
+    for compresslevel, store_compressed in settings:
+        stream = BytesIO()
+        start = time.perf_counter()
+        write_package(presentation.part.package, stream, compresslevel, store_compressed)
+        label = f"level={compresslevel} store={store_compressed}"
+        results.append((label, time.perf_counter() - start, stream.tell()))
+    return results
+
+
+### SYNTHETIC DECKS
+
+SLIDE_KINDS = ("text", "picture", "group", "chart", "table", "smartart", "ole_photo")
+
+DIAGRAM_DRAWING_XML = (
+    '<dsp:drawing xmlns:dsp="http://schemas.microsoft.com/office/drawing/2008/diagram" '
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+    '<dsp:spTree><dsp:nvGrpSpPr><dsp:cNvPr id="0" name=""/><dsp:cNvGrpSpPr/></dsp:nvGrpSpPr>'
+    '<dsp:grpSpPr/>%s</dsp:spTree></dsp:drawing>'
+)
+DIAGRAM_SHAPE_XML = (
+    '<dsp:sp modelId="{%08d-0000-0000-0000-000000000000}">'
+    '<dsp:nvSpPr><dsp:cNvPr id="0" name=""/><dsp:cNvSpPr/></dsp:nvSpPr>'
+    '<dsp:spPr><a:xfrm><a:off x="%d" y="914400"/><a:ext cx="1828800" cy="914400"/></a:xfrm>'
+    '<a:prstGeom prst="roundRect"><a:avLst/></a:prstGeom></dsp:spPr>'
+    '<dsp:txBody><a:bodyPr/><a:lstStyle/><a:p><a:r><a:t>Step %d</a:t></a:r></a:p></dsp:txBody>'
+    '</dsp:sp>'
+)
+DIAGRAM_FRAME_XML = (
+    '<p:graphicFrame xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main" '
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<p:nvGraphicFramePr><p:cNvPr id="%d" name="Diagram %d"/><p:cNvGraphicFramePr/><p:nvPr/>'
+    '</p:nvGraphicFramePr>'
+    '<p:xfrm><a:off x="457200" y="1600200"/><a:ext cx="8229600" cy="2743200"/></p:xfrm>'
+    '<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/diagram">'
+    '<dgm:relIds xmlns:dgm="http://schemas.openxmlformats.org/drawingml/2006/diagram" '
+    'r:dm="" r:lo="" r:qs="" r:cs=""/></a:graphicData></a:graphic></p:graphicFrame>'
+)
+OLE_PHOTO_FRAME_XML = (
+    '<p:graphicFrame xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main" '
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006">'
+    '<p:nvGraphicFramePr><p:cNvPr id="%(id)d" name="Object %(id)d"/><p:cNvGraphicFramePr/>'
+    '<p:nvPr/></p:nvGraphicFramePr>'
+    '<p:xfrm><a:off x="914400" y="1600200"/><a:ext cx="3657600" cy="2743200"/></p:xfrm>'
+    '<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/presentationml/2006/ole">'
+    '<mc:AlternateContent><mc:Fallback>'
+    '<p:oleObj name="Photo Editor Photo" r:id="%(ole_rId)s" imgW="4000" imgH="3000" '
+    'progId="MSPhotoEd.3"><p:embed/>'
+    '<p:pic><p:nvPicPr><p:cNvPr id="0" name=""/><p:cNvPicPr/><p:nvPr/></p:nvPicPr>'
+    '<p:blipFill><a:blip r:embed="%(image_rId)s"/><a:stretch><a:fillRect/></a:stretch>'
+    '</p:blipFill><p:spPr><a:xfrm><a:off x="914400" y="1600200"/>'
+    '<a:ext cx="3657600" cy="2743200"/></a:xfrm><a:prstGeom prst="rect"><a:avLst/></a:prstGeom>'
+    '</p:spPr></p:pic></p:oleObj></mc:Fallback></mc:AlternateContent>'
+    '</a:graphicData></a:graphic></p:graphicFrame>'
+)
+
+
+def _image_stream(seed, size=(400, 300), fmt="JPEG"):
+    from PIL import Image
+
+    image = Image.merge("RGB", [Image.effect_noise(size, 32 + seed % 64) for _ in range(3)])
+    stream = BytesIO()
+    image.save(stream, fmt)
+    stream.seek(0)
+    return stream
+
+
+def _add_text_slide(presentation, i):
+    slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+    slide.shapes.title.text = f"Text slide {i}"
+    slide.placeholders[1].text = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8
+    slide.notes_slide.notes_text_frame.text = f"Notes for slide {i}"
+
+
+def _add_picture_slide(presentation, i):
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+    slide.shapes.title.text = f"Picture slide {i}"
+    picture = slide.shapes.add_picture(_image_stream(i), Inches(1), Inches(1.5), Inches(4))
+    picture.crop_left, picture.crop_right = 0.1, 0.15
+    picture.crop_top, picture.crop_bottom = 0.05, 0.2
+
+
+def _add_group_slide(presentation, i):
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+    slide.shapes.title.text = f"Group slide {i}"
+    group = slide.shapes.add_group_shape()
+    for j in range(4):
+        shape = group.shapes.add_shape(
+            MSO_SHAPE.ROUNDED_RECTANGLE, Inches(0.5 + 2.2 * j), Inches(2), Inches(2), Inches(1)
+        )
+        shape.text = f"Item {j}"
+    group.shapes.add_textbox(Inches(0.5), Inches(3.5), Inches(8), Inches(1)).text = "Caption"
+
+
+def _add_chart_slide(presentation, i):
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+    slide.shapes.title.text = f"Chart slide {i}"
+    chart_data = CategoryChartData()
+    chart_data.categories = ["Q1", "Q2", "Q3", "Q4"]
+    chart_data.add_series("Revenue", (i, i + 1.5, i + 3.2, i + 2.1))
+    chart_data.add_series("Cost", (i * 0.5, i + 0.7, i + 1.1, i + 1.9))
+    slide.shapes.add_chart(
+        XL_CHART_TYPE.COLUMN_CLUSTERED, Inches(1), Inches(1.5), Inches(8), Inches(5), chart_data
+    )
+
+
+def _add_table_slide(presentation, i, rows=8, cols=5):
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+    slide.shapes.title.text = f"Table slide {i}"
+    table = slide.shapes.add_table(
+        rows, cols, Inches(0.5), Inches(1.5), Inches(9), Inches(4)
+    ).table
+    for r in range(rows):
+        for c in range(cols):
+            table.cell(r, c).text = f"R{r}C{c}" if r else f"Column {c}"
+
+
+def _add_smartart_slide(presentation, i, steps=4):
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+    slide.shapes.title.text = f"SmartArt slide {i}"
+    package = slide.part.package
+    drawing_xml = DIAGRAM_DRAWING_XML % "".join(
+        DIAGRAM_SHAPE_XML % (j, 457200 + 2057400 * j, j) for j in range(steps)
+    )
+    drawing_part = Part(
+        package.next_partname("/ppt/diagrams/drawing%d.xml"),
+        "application/vnd.ms-office.drawingml.diagramDrawing+xml",
+        package,
+        drawing_xml.encode("utf-8"),
+    )
+    slide.part.relate_to(
+        drawing_part, "http://schemas.microsoft.com/office/2007/relationships/diagramDrawing"
+    )
+    shape_id = slide.shapes._next_shape_id
+    slide.shapes._spTree.append(parse_xml(DIAGRAM_FRAME_XML % (shape_id, shape_id)))
+
+
+def _add_ole_photo_slide(presentation, i):
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+    slide.shapes.title.text = f"OLE photo slide {i}"
+    package = slide.part.package
+    _, image_rId = slide.part.get_or_add_image_part(_image_stream(i, fmt="PNG"))
+    ole_part = Part(
+        package.next_partname("/ppt/embeddings/oleObject%d.bin"),
+        CT.OFC_OLE_OBJECT,
+        package,
+        os.urandom(2048),
+    )
+    ole_rId = slide.part.relate_to(ole_part, RT.OLE_OBJECT)
+    shape_id = slide.shapes._next_shape_id
+    slide.shapes._spTree.append(parse_xml(
+        OLE_PHOTO_FRAME_XML % {"id": shape_id, "ole_rId": ole_rId, "image_rId": image_rId}
+    ))
+
+
+SLIDE_BUILDERS = {
+    "text": _add_text_slide,
+    "picture": _add_picture_slide,
+    "group": _add_group_slide,
+    "chart": _add_chart_slide,
+    "table": _add_table_slide,
+    "smartart": _add_smartart_slide,
+    "ole_photo": _add_ole_photo_slide,
+}
+
+
+def make_synthetic_deck(file_path, slides_per_kind=5, kinds=SLIDE_KINDS):
+    """
+    Saves a deck with `slides_per_kind` slides of each kind in `kinds`, cycling through the 
+    kinds so the first slide is a title-and-content text slide usable as a template. 
+    SmartArt slides only carry the drawing part that normalization reads, so the deck is 
+    meant for this library rather than for PowerPoint
+    """
+    presentation = Presentation()
+    for i in range(slides_per_kind):
+        for kind in kinds:
+            SLIDE_BUILDERS[kind](presentation, i)
+    presentation.save(file_path)
+    return file_path
+
+
+### BENCHMARK SUITE
+
+class PeakRSS(object):
+    """Context manager sampling the resident set size of this process from a thread"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self._process.memory_info().rss
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._process.memory_info().rss)
+
+
+def measure(operation, func, output_path=None, **details):
+    """
+    Runs `func` once, silencing its output, and returns dict with wall time, peak RSS, timings 
+    and counters of its phases and, if `output_path` given, size of the file written
+    """
+    METRICS.reset()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull), PeakRSS() as rss:
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+    result = {"operation": operation, "seconds": seconds, "peak_rss_bytes": rss.peak}
+    result["phases"] = METRICS.summary()
+    if output_path:
+        result["output_bytes"] = os.path.getsize(output_path)
+    result.update(details)
+    return result
+
+
+def run_suite(slides_per_kind=5, populate_chars=20000, work_dir=None):
+    """
+    Times loading, `duplicate_slide`, `populate_slide`, `copy_slide_to_other_presentation` and 
+    `save` on a synthetic deck. Returns report as dict
+    """
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        deck_path = make_synthetic_deck(os.path.join(tmp_dir, "deck.pptx"), slides_per_kind)
+        slide_count = slides_per_kind * len(SLIDE_KINDS)
+        details = {"slides": slide_count}
+        results = []
+
+        managers = []
+        results.append(measure(
+            "load", lambda: managers.append(PresentationManager(deck_path, template_slide_index=0)),
+            **details
+        ))
+        manager = managers[0]
+
+        results.append(measure(
+            "duplicate_slide",
+            lambda: [manager.duplicate_slide(i) for i in range(slide_count)],
+            **details
+        ))
+
+        text = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (populate_chars // 57)
+        results.append(measure(
+            "populate_slide", lambda: manager.populate_slide(text, "Populated"),
+            chars=len(text), **details
+        ))
+
+        save_path = os.path.join(tmp_dir, "saved.pptx")
+        results.append(measure("save", lambda: manager.save(save_path), save_path, **details))
+
+        copy_path = os.path.join(tmp_dir, "copied.pptx")
+        results.append(measure(
+            "copy_slide_to_other_presentation",
+            lambda: PresentationManager.copy_slide_to_other_presentation(deck_path, copy_path),
+            copy_path, **details
+        ))
+
+        deck_bytes = os.path.getsize(deck_path)
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "python_pptx": pptx.__version__,
+        "platform": platform.platform(),
+        "deck": {"slides_per_kind": slides_per_kind, "kinds": list(SLIDE_KINDS),
+                 "slides": slide_count, "bytes": deck_bytes},
+        "results": results,
+    }
+
+
+def print_suite_report(report, file=None):
+    title = "suite ({} slides)".format(report["deck"]["slides"])
+    print("*" * 40, title, "*" * 40, sep="\n", file=file)
+    print("{:>34s} | {:>10s} | {:>12s} | {:>12s}".format(
+        "operation", "seconds", "peak RSS (MB)", "output (KB)"
+    ), file=file)
+    for result in report["results"]:
+        output = result.get("output_bytes")
+        print("{:>34s} | {:>10.3f} | {:>13.1f} | {:>12s}".format(
+            result["operation"],
+            result["seconds"],
+            result["peak_rss_bytes"] / 2 ** 20,
+            "-" if output is None else "{:.1f}".format(output / 1024),
+        ), file=file)
+
+
+def print_save_results(title, results, file=None):
+    print("*" * 40, title, "*" * 40, sep="\n", file=file)
+    print("{:>28s} | {:>10s} | {:>12s}".format("setting", "seconds", "size (KB)"), file=file)
+    for label, seconds, size in results:
+        print("{:>28s} | {:>10.3f} | {:>12.1f}".format(label, seconds, size / 1024), file=file)
+
+
+def print_template_copy_results(title, results, file=None):
+    print("*" * 40, title, "*" * 40, sep="\n", file=file)
+    print("{:>10s} | {:>14s} | {:>14s}".format("kind", "duplicate (ms)", "stamp (ms)"), file=file)
+    for kind, duplicate_ms, stamp_ms in results:
+        print("{:>10s} | {:>14.3f} | {:>14.3f}".format(kind, duplicate_ms, stamp_ms), file=file)
+
+
+def print_results(title, results, file=None):
+    print("*" * 40, title, "*" * 40, sep="\n", file=file)
+    print("{:>10s} | {:>10s} | {:>12s}".format("slides", "seconds", "ms per slide"), file=file)
+    for count, seconds, per_slide in results:
+        print("{:>10d} | {:>10.3f} | {:>12.3f}".format(count, seconds, per_slide), file=file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks PresentationManager operations")
+    parser.add_argument("--slides-per-kind", type=int, default=5,
+                        help="number of synthetic slides of each kind in the suite deck")
+    parser.add_argument("--report", help="path of JSON report to write, '-' for stdout")
+    parser.add_argument("--capture", choices=("cprofile", "tracemalloc"),
+                        help="profile load and save phases, logging the reports")
+    parser.add_argument("--suite-only", action="store_true",
+                        help="skip populate_slides and save micro-benchmarks")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.capture else logging.WARNING)
+    METRICS.capture_mode = args.capture
+
+    # Tables go to stderr when stdout carries the JSON report, so it stays parseable
+    tables = sys.stderr if args.report == "-" else sys.stdout
+
+    report = run_suite(args.slides_per_kind)
+    print_suite_report(report, file=tables)
+    if args.report and args.report != "-":
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print("Saved report to:", args.report, file=tables)
+
+    if not args.suite_only:
+        print_results("populate_slides", bench_populate_slides(), file=tables)
+        print_results(
+            "populate_slides (compiled template)", bench_populate_slides(compile_template=True),
+            file=tables,
+        )
+        print_template_copy_results(
+            "duplicate_slide vs stamp_slide", bench_template_copies(), file=tables
+        )
+        print_save_results("save", bench_save(), file=tables)
+
+    if args.report == "-":
+        json.dump(report, sys.stdout, indent=2)
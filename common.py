@@ -1,4 +1,9 @@
 import re
+import logging
+import hashlib
+import threading
+from collections import OrderedDict
+from bisect import bisect_right
 from io import BytesIO
 from copy import deepcopy
 from lxml import etree
@@ -6,42 +11,144 @@ from lxml.etree import Element, SubElement
 from pptx.oxml import parse_xml
 from pptx.shapes.autoshape import Shape
 from pptx.shapes.group import GroupShape
+from pptx.oxml.shapes.groupshape import CT_GroupShape
 from pptx.shapes.placeholder import PlaceholderGraphicFrame
 from pptx.enum.shapes import MSO_SHAPE_TYPE
+from metrics import METRICS
+from utils import _object_rels, ShapeIndex, DIAGRAM_DRAWING_RELTYPE
 import pprint
 pp = pprint.PrettyPrinter(indent=4)
 
+logger = logging.getLogger(__name__)
+
 NS = {'dgm': 'http://schemas.openxmlformats.org/drawingml/2006/diagram',
  'dsp': 'http://schemas.microsoft.com/office/drawing/2008/diagram',
  'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
  'p': 'http://schemas.openxmlformats.org/presentationml/2006/main'}
 
 
+# Points where text can be split: at a newline, or at the space after a full stop
+CHUNK_BOUNDARY = re.compile(r"\n|(?<=\.) ")
+
+
+def iter_text_chunks(text, max_chunk_size=2250):
+    """
+    Generates chunks of `text` no longer than `max_chunk_size`, split at the last newline or 
+    sentence end that fits. Falls back to a hard split if a chunk has no such boundary.
+    """
+    # Index all boundaries once, then pick each split point by bisection
+    boundaries = [match.start() for match in CHUNK_BOUNDARY.finditer(text)]
+    start = 0
+    while len(text) - start > max_chunk_size:
+        # Determine best point `i` to truncate text where start < i <= start + max_chunk_size
+        k = bisect_right(boundaries, start + max_chunk_size) - 1
+        if k >= 0 and boundaries[k] > start:
+            i = boundaries[k]
+        else:
+            i = start + max_chunk_size
+        # Strip chunk of trailing whitespace and newlines
+        yield text[start:i].strip("\n").strip()
+        start = i
+    yield text[start:].strip("\n").strip()
+
+
+def iter_text_pages(text, metrics, width, height, line_height, space_before=0):
+    """
+    Yields chunks of text that each fit in a text frame of given width and height, wrapping 
+    paragraphs with `metrics` (see `utils.FontMetrics`) and packing as many lines as fit. 
+    A paragraph split between chunks continues at the start of the next one. 
+    Chunks are slices of `text`, so words broken across lines and runs of spaces are kept as 
+    they are, and only the newline between chunks ending at a paragraph is left out. 
+    All sizes are in the units of `metrics`
+    """
+    page_start, used, page_has_lines = 0, 0, False
+    # Offset of the current paragraph in `text`
+    offset = 0
+    for paragraph in text.split("\n"):
+        for i, start in enumerate(metrics.line_starts(paragraph, width)):
+            # Spacing before paragraphs does not apply at the top of the frame
+            needed = line_height + (space_before if i == 0 and page_has_lines else 0)
+            if used + needed > height and page_has_lines:
+                line_start = offset + start
+                yield text[page_start:line_start - 1 if i == 0 else line_start]
+                page_start, used, needed = line_start, 0, line_height
+            used += needed
+            page_has_lines = True
+        offset += len(paragraph) + 1
+    yield text[page_start:]
+
+
 def create_text_chunks(text, max_chunk_size=2250):
-    chunks = []
-    remaining = text
-    while len(remaining) > max_chunk_size:
-        # Determine best point `i` to truncate text where i < max_chunk_size
-        i = max_chunk_size
-        while (remaining[i] != "\n") and (remaining[i-1:i+1] != ". "):
-            i -= 1
-        # Split remaining text into two — append first to `chunks` and second to `remaining`
-        chunks.append(remaining[:i])
-        remaining = remaining[i:]
-    # Append remaining text to `chunks`
-    chunks.append(remaining)
-    # Strip all chunks of trailing whitespace and newlines
-    for i in range(len(chunks)):
-        chunks[i] = chunks[i].strip("\n")
-        chunks[i] = chunks[i].strip()
-    
-    return chunks
+    return list(iter_text_chunks(text, max_chunk_size))
+
+
+class DrawingConversionCache(object):
+    """
+    LRU cache of SmartArt drawings converted to group shapes, keyed by hash of the drawing XML. 
+    Stores the converted `p:grpSp` element, so repeated drawings only need a copy with fresh 
+    shape ids
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._groups = OrderedDict()
+        # Shared across the worker threads of AsyncPresentationService
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(drawing_xml):
+        return hashlib.sha1(drawing_xml).hexdigest()
+
+    def get(self, key):
+        """Returns copy of cached group element, or None"""
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                self.misses += 1
+            else:
+                self._groups.move_to_end(key)
+                self.hits += 1
+        if group is None:
+            METRICS.count("diagram_cache.miss")
+            return None
+        METRICS.count("diagram_cache.hit")
+        return deepcopy(group)
+
+    def put(self, key, group):
+        group = deepcopy(group)
+        with self._lock:
+            self._groups[key] = group
+            self._groups.move_to_end(key)
+            while len(self._groups) > self.maxsize:
+                self._groups.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._groups.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._groups)
 
 
-def find_and_replace_diagrams(slide):
+# Conversions shared by all presentations in this process
+DIAGRAM_CACHE = DrawingConversionCache()
+
+
+def find_and_replace_diagrams(slide, cache=DIAGRAM_CACHE, shape_index=None):
+    """
+    Replaces SmartArt diagrams in slide with groups of the shapes in their drawings. 
+    Shape ids come from `shape_index`, a ShapeIndex of the slide kept up to date, if given
+    """
+    if shape_index is None:
+        shape_index = ShapeIndex(slide)
+
     # Collect all diagrams in slide
     diagrams = []
-    for shape in slide.shapes:
+    for shape in shape_index.shapes:
         if "Diagram" in shape.name or (isinstance(shape, PlaceholderGraphicFrame)):
             diagrams.append(shape)
 
@@ -54,36 +161,68 @@ def find_and_replace_diagrams(slide):
         # Remove diagram
         parent = diagram.element.getparent()
         parent.remove(diagram.element)
+        shape_index.remove(diagram)
+
         # Get id number for next group shape
-        next_id = slide.shapes._next_shape_id
-        # Make Shape objects
-        new_shape_objects = shapes_from_drawing(drawing_xml, next_id, parent)
-        # Create new groupShape, attach shape objects, attach to slide
-        add_group_to_slide(slide, new_shape_objects, position)
+        next_id = shape_index.next_id
+
+        key = cache.key(drawing_xml) if cache is not None else None
+        group = cache.get(key) if cache is not None else None
+        if group is None:
+            # Make Shape objects
+            new_shape_objects = shapes_from_drawing(drawing_xml, next_id, parent)
+            # Create new groupShape, attach shape objects, attach to slide
+            group = add_group_to_slide(slide, new_shape_objects, shape_id=next_id)._element
+            if cache is not None:
+                cache.put(key, group)
+        else:
+            slide.shapes._spTree.insert_element_before(group, "p:extLst")
+        # Group and its shapes get consecutive ids, so the group does not share an id with a shape
+        shape_index.next_id = renumber_group(group, next_id)
+        group_shape = slide.shapes._shape_factory(group)
+        set_position(group_shape, position)
+        shape_index.add(group_shape)
+
+
+def renumber_group(group, next_id):
+    """Gives group element and the shapes in it consecutive ids starting at `next_id`"""
+    for cNvPr in group.iter("{%s}cNvPr" % NS['p']):
+        cNvPr.set("id", str(next_id))
+        prefix = "Group" if etree.QName(cNvPr.getparent().getparent()).localname == "grpSp" else "Freeform"
+        cNvPr.set("name", f"{prefix} {next_id}")
+        next_id += 1
+    return next_id
 
 
-def find_and_replace_OLE_photos(slide):
+def find_and_replace_OLE_photos(slide, shape_index=None):
+    """
+    Replaces embedded photo editor objects in slide with their pictures. 
+    Shape ids come from `shape_index`, a ShapeIndex of the slide kept up to date, if given
+    """
+    if shape_index is None:
+        shape_index = ShapeIndex(slide)
     shapes = slide.shapes
     # Collect all embedded OLE objects
     ole_photo_objs = []
-    for shape in shapes:
-        if shape.shape_type == MSO_SHAPE_TYPE.EMBEDDED_OLE_OBJECT:
-            if shape.ole_format.prog_id == "MSPhotoEd.3":
-                ole_photo_objs.append(shape)
+    for shape in shape_index.of_type(MSO_SHAPE_TYPE.EMBEDDED_OLE_OBJECT):
+        if shape.ole_format.prog_id == "MSPhotoEd.3":
+            ole_photo_objs.append(shape)
 
     for obj in ole_photo_objs:
         # Get picture object
         pic = obj.element.xpath(".//a:graphic/a:graphicData/*/*/p:oleObj/p:pic")[0]
         # Edit id and name of picture
         cNvPr = pic.xpath(".//p:nvPicPr/p:cNvPr")[0]
-        next_id = slide.shapes._next_shape_id
+        next_id = shape_index.allocate()
         cNvPr.set("name", "Picture " + str(next_id))
         cNvPr.set("id", str(next_id))
         # Insert picture
         shapes._spTree.insert_element_before(pic, "p:extLst")
+        shape_index.add(shapes._shape_factory(pic))
         # Remove OLE object
         parent = obj.element.getparent()
         parent.remove(obj.element)
+        shape_index.remove(obj)
 
 
 def find_and_replace_OLE(slide):
@@ -112,7 +251,7 @@ def find_and_replace_OLE(slide):
 
         # Get binary of embedded OLE object
         embed = obj.part.rels[rel_id]._target._blob
-        print(ole.prog_id)
+        logger.debug("Replacing OLE object %s", ole.prog_id)
 
         # Add new OLE object
         slide.shapes.add_ole_object(
@@ -135,8 +274,20 @@ def find_and_replace_OLE(slide):
 #     return max_id + 1
 
 def get_drawing_xml(diagram):
-    for _, rel in diagram.part.rels.items():
-        if re.match(r".*drawing\d+\.xml$", rel.target_partname):
+    # Data part of the diagram names the relationship of its drawing
+    try:
+        data_rId = diagram.element.xpath(".//a:graphicData/*/@r:dm")[0]
+        data_xml = etree.fromstring(diagram.part.related_part(data_rId).blob)
+        drawing_rId = data_xml.xpath(".//dsp:dataModelExt/@relId", namespaces=NS)[0]
+        return diagram.part.related_part(drawing_rId).blob
+    except (IndexError, KeyError):
+        pass
+
+    # Otherwise use first drawing related to the slide
+    for rel in _object_rels(diagram.part):
+        if rel.is_external:
+            continue
+        if rel.reltype == DIAGRAM_DRAWING_RELTYPE or re.match(r".*drawing\d+\.xml$", rel.target_partname):
             drawing_xml = rel._target._blob    
             return drawing_xml   
         
@@ -146,7 +297,7 @@ def get_xfrm(diagram):
     for child in el:
         new_child = deepcopy(child)
         new_child.tag = "{%s}" % NS['a'] + "xfrm"
-        print(etree.tostring(new_child, pretty_print=True).decode())
+        logger.debug(etree.tostring(new_child, pretty_print=True).decode())
         xfrm.append(new_child) 
     return xfrm   
 
@@ -189,9 +340,20 @@ def shapes_from_drawing(drawing_xml, id_next, parent):
     return new_shape_objects
 
 
-def add_group_to_slide(slide, shapes, position=None):
+def add_group_to_slide(slide, shapes, position=None, shape_id=None):
+    """Groups shapes in a new group shape of slide, with id `shape_id` if given"""
     P = "{%s}" % NS['p']
-    new_group = slide.shapes.add_group_shape(shapes=shapes)
+    if shape_id is None:
+        new_group = slide.shapes.add_group_shape(shapes=shapes)
+    else:
+        # Same as `add_group_shape`, without scanning the shape tree for a free id
+        grpSp = CT_GroupShape.new_grpSp(shape_id, "Group %d" % shape_id)
+        slide.shapes._spTree.insert_element_before(grpSp, "p:extLst")
+        for shape in shapes:
+            grpSp.insert_element_before(shape._element, "p:extLst")
+        if shapes:
+            grpSp.recalculate_extents()
+        new_group = slide.shapes._shape_factory(grpSp)
 
     # nvGrpSpPr   = SubElement(new_group.element, P + "nvGrpSpPr")
     # cNvPr       = SubElement(nvGrpSpPr, P + "cNvPr",
@@ -203,14 +365,19 @@ def add_group_to_slide(slide, shapes, position=None):
     # nvPr        = SubElement(nvGrpSpPr, P + "nvPr")
     # grpSpPr     = SubElement(new_group.element, P + "grpSpPr")  
     
+    set_position(new_group, position)
+    return new_group
+
+
+def set_position(shape, position):
     if position:
         try:
             top, left = position
         except (TypeError, ValueError):
             pass
         else:
-            new_group.top = top
-            new_group.left = left
+            shape.top = top
+            shape.left = left
 
 
 def print_shape_type(shape, indent=0):
@@ -0,0 +1,102 @@
+import os
+import hashlib
+import logging
+import tempfile
+
+import pptx
+
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Bump when normalization of source decks changes, so decks normalized before are not reused
+NORMALIZATION_VERSION = 1
+
+
+class DeckCache(object):
+    """
+    Size-bounded disk cache of normalized decks, keyed by hash of the source file's content,
+    the normalization version and the python-pptx version.
+    Entries are written to a temporary file and renamed into place, so worker processes sharing
+    the directory never read a partial entry. Reads update the modification time of an entry,
+    and the least recently used entries are removed once the directory exceeds `max_bytes`
+    """
+
+    SUFFIX = ".pptx"
+
+    def __init__(self, directory, max_bytes=2 * 2 ** 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(blob):
+        digest = hashlib.sha256(blob)
+        digest.update(f"{NORMALIZATION_VERSION}:{pptx.__version__}".encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, key):
+        """Returns bytes of normalized deck cached under key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+            os.utime(path)
+        except OSError:
+            # Not cached, or evicted by another process meanwhile
+            METRICS.count("deck_cache.miss")
+            return None
+        METRICS.count("deck_cache.hit")
+        return blob
+
+    def put(self, key, blob):
+        """Stores bytes of normalized deck under key, then evicts entries over the size limit"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            logger.exception("Could not cache normalized deck %s", key)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in `max_bytes`"""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(self.SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Removed by another process, or still open on platforms that lock open files
+                continue
+            total -= size
+            METRICS.count("deck_cache.evicted")
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(self.SUFFIX):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
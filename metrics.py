@@ -0,0 +1,146 @@
+import io
+import time
+import logging
+import cProfile
+import pstats
+import tracemalloc
+
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Sent to hooks for every timing and counter recorded
+MetricEvent = namedtuple("MetricEvent", ["kind", "name", "value", "tags"])
+
+CAPTURE_MODES = (None, "cprofile", "tracemalloc")
+
+
+class Metrics(object):
+    """
+    Collects timings and counters of PresentationManager phases, e.g. load, normalization of
+    each slide, copy of each kind of shape, chart cloning and save.
+    Hooks are callables receiving a MetricEvent for each timing and counter, e.g. to forward
+    them to a monitoring system.
+    If `capture_mode` is "cprofile" or "tracemalloc", top-level phases are also profiled and
+    the report is logged and kept in `profiles`
+    """
+
+    def __init__(self, hooks=(), capture_mode=None, profile_limit=20):
+        self.hooks = list(hooks)
+        self.capture_mode = capture_mode
+        self.profile_limit = profile_limit
+        self.reset()
+
+    def reset(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.profiles = {}
+
+    @property
+    def capture_mode(self):
+        return self._capture_mode
+
+    @capture_mode.setter
+    def capture_mode(self, mode):
+        if mode not in CAPTURE_MODES:
+            raise ValueError(f"capture_mode must be one of {CAPTURE_MODES}, not {mode!r}")
+        self._capture_mode = mode
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def _emit(self, kind, name, value, tags):
+        for hook in self.hooks:
+            try:
+                hook(MetricEvent(kind, name, value, tags))
+            except Exception:
+                logger.exception("Metrics hook %r failed", hook)
+
+    def record(self, name, seconds, **tags):
+        self.seconds[name] += seconds
+        self.calls[name] += 1
+        if self.hooks:
+            self._emit("timing", name, seconds, tags)
+
+    def count(self, name, value=1, **tags):
+        self.counters[name] += value
+        if self.hooks:
+            self._emit("counter", name, value, tags)
+
+    @contextmanager
+    def timer(self, name, profile=False, **tags):
+        """Records wall time of block under `name`, profiling it if `profile` and capture is on"""
+        capture = self.capture(name) if profile and self.capture_mode else _no_capture()
+        start = time.perf_counter()
+        try:
+            with capture:
+                yield
+        finally:
+            self.record(name, time.perf_counter() - start, **tags)
+
+    @contextmanager
+    def capture(self, name, mode=None):
+        """Profiles block with cProfile or tracemalloc, logging report and keeping it in `profiles`"""
+        mode = mode or self.capture_mode
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                stream = io.StringIO()
+                stats = pstats.Stats(profiler, stream=stream)
+                stats.sort_stats("cumulative").print_stats(self.profile_limit)
+                self._add_profile(name, stream.getvalue())
+        elif mode == "tracemalloc":
+            was_tracing = tracemalloc.is_tracing()
+            if not was_tracing:
+                tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            try:
+                yield
+            finally:
+                after = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                if not was_tracing:
+                    tracemalloc.stop()
+                lines = [f"Peak traced memory: {peak / 2 ** 20:.1f} MB"]
+                lines.extend(
+                    str(stat) for stat in after.compare_to(before, "lineno")[:self.profile_limit]
+                )
+                self._add_profile(name, "\n".join(lines))
+        else:
+            yield
+
+    def _add_profile(self, name, report):
+        self.profiles[name] = report
+        logger.info("Profile of %s (%s):\n%s", name, self.capture_mode, report)
+
+    def summary(self):
+        """Returns dict of timings as {name: (calls, total seconds)} and counters"""
+        return {
+            "timings": {name: (self.calls[name], self.seconds[name]) for name in self.seconds},
+            "counters": dict(self.counters),
+        }
+
+    def log_summary(self, level=logging.INFO):
+        for name in sorted(self.seconds, key=self.seconds.get, reverse=True):
+            logger.log(level, "%s: %d calls, %.3fs", name, self.calls[name], self.seconds[name])
+        for name in sorted(self.counters):
+            logger.log(level, "%s: %d", name, self.counters[name])
+
+
+@contextmanager
+def _no_capture():
+    yield
+
+
+# Metrics of this process, shared by PresentationManager and helpers in `utils`
+METRICS = Metrics()
@@ -1,28 +1,58 @@
-import traceback
+import os
+import time
+import logging
+
+from io import BytesIO
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from functools import partial
 
 from pathlib import Path
 from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+
+from common import iter_text_chunks, iter_text_pages, find_and_replace_diagrams, find_and_replace_OLE_photos, find_and_replace_OLE, print_shape_type
+from metrics import METRICS
+from utils import open_slides, slide_count, _check_slide_indices, font_metrics, text_frame_geometry, remove_unused_parts, write_package, partname_allocator, SlidePrototype, SlidePayload, SlideImporter, ShapeIndex
+
+logger = logging.getLogger(__name__)
 
-from common import create_text_chunks, find_and_replace_diagrams, find_and_replace_OLE_photos, find_and_replace_OLE, print_shape_type
-from utils import copy_shapes, remove_shape, _object_rels
 
 class PresentationManager(object):
     """Contains Presentation object and functions to manage it"""
     
     # Character limit for content text in single slide
     MAX_CONTENT_LIMIT=2250
+    # Text is measured in quarter points so that integer font sizes keep their precision
+    MEASURE_UNITS_PER_PT = 4
 
-    def __init__(self, file_path=None, template_slide_index=1, slide_size=()):
+    def __init__(self, file_path=None, template_slide_index=1, slide_size=(), compile_template=False,
+                 lazy_normalization=False, font_file=None, cache=None, only_slides=None):
         # Since presentation.Presentation class not intended to be constructed directly, 
         # using pptx.Presentation() to open presentation
-        if file_path and Path(file_path).exists():
-            self.presentation = Presentation(file_path)
-            print("Loaded presentation from:", file_path)
-        else:
-            if file_path:
-                print(f"Could not load {file_path}")  
-            self.presentation = Presentation()
-            print("New presentation object loaded")
+        self.file_path = file_path
+        # Slide parts with SmartArt and OLE photos already converted. If `lazy_normalization` is set,
+        # slides are only converted when first duplicated, read or saved
+        self.lazy_normalization = lazy_normalization
+        self._normalized = set()
+        # Slide part -> ShapeIndex of the slide, built on first use and kept up to date by 
+        # normalization
+        self._shape_indexes = {}
+        # If set, a DeckCache from which normalized decks are loaded, and to which they are added
+        self.cache = cache
+        # If set, only slides at these indices are loaded from the file, in their original order
+        self.only_slides = only_slides
+
+        with METRICS.timer("load", profile=True):
+            if file_path and (hasattr(file_path, "read") or Path(file_path).exists()):
+                self._load(file_path)
+                logger.info("Loaded presentation from: %s", file_path)
+            else:
+                if file_path:
+                    logger.warning("Could not load %s", file_path)
+                self.presentation = Presentation()
+                logger.info("New presentation object loaded")
+                if not lazy_normalization:
+                    self.normalize_all_slides()
 
         if slide_size:
             height, width = slide_size
@@ -30,16 +60,64 @@ class PresentationManager(object):
 
         # Setting index of slide to be used as a template
         self.template_slide_index = template_slide_index
+        # If set, copies of the template are stamped from a compiled prototype of the slide
+        self.compile_template = compile_template
+        self._prototypes = {}
+        # If set, content is split to fit the template's text frame, measured with this font file
+        # in place of the font used by the template. Otherwise split at MAX_CONTENT_LIMIT characters
+        self.font_file = font_file
 
         # Get index of Blank slide layout
         layout_items_count = [len(layout.placeholders) for layout in self.presentation.slide_layouts]
         min_items = min(layout_items_count)
         self.blank_layout_id = layout_items_count.index(min_items)
 
-        for slide in self.presentation.slides:
-            find_and_replace_diagrams(slide)
-            find_and_replace_OLE_photos(slide)
-            # find_and_replace_OLE(slide)
+        # Parts added from slide payloads, keyed by content hash so identical media is stored once
+        self._payload_parts = {}
+
+        # Partnames of new parts are handed out by one allocator for the whole package
+        self._partnames = partname_allocator(self.presentation)
+
+        # Copies slides from this and other presentations into this one
+        self._importer = SlideImporter(self.presentation.part.package)
+
+        # Slide count and next available slide ID, kept as counters so adding slides does not
+        # rescan `sldIdLst`
+        self._next_slide_id = 0
+        self._seed_slide_counters()
+
+    def _load(self, file_path):
+        """
+        Opens presentation, or only slides in `only_slides`, and, unless `lazy_normalization` is 
+        set, normalizes all slides. With a cache and all slides, a deck normalized before is opened 
+        from the cache instead, and decks normalized on load are added to it
+        """
+        if self.only_slides is not None:
+            self.presentation = open_slides(file_path, self.only_slides)
+            if not self.lazy_normalization:
+                self.normalize_all_slides()
+            return
+
+        if self.cache is None:
+            self.presentation = Presentation(file_path)
+            if not self.lazy_normalization:
+                self.normalize_all_slides()
+            return
+
+        blob = file_path.read() if hasattr(file_path, "read") else Path(file_path).read_bytes()
+        key = self.cache.key(blob)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.presentation = Presentation(BytesIO(cached))
+            self._normalized.update(slide.part for slide in self.presentation.slides)
+            return
+
+        self.presentation = Presentation(BytesIO(blob))
+        if not self.lazy_normalization:
+            self.normalize_all_slides()
+            normalized = BytesIO()
+            write_package(self.presentation.part.package, normalized)
+            self.cache.put(key, normalized.getvalue())
 
     @property
     def xml_slides(self):
@@ -57,72 +135,169 @@ class PresentationManager(object):
         self.presentation.slide_height = height
         self.presentation.slide_width = width        
 
+    def normalize_slide(self, slide):
+        """Converts SmartArt and OLE photos in slide to shapes, unless already done"""
+        if slide.part in self._normalized:
+            return slide
+        with METRICS.timer("normalize_slide"):
+            shape_index = self.shape_index(slide)
+            find_and_replace_diagrams(slide, shape_index=shape_index)
+            find_and_replace_OLE_photos(slide, shape_index=shape_index)
+            # find_and_replace_OLE(slide)
+        self._normalized.add(slide.part)
+        return slide
+
+    def normalize_all_slides(self):
+        for slide in self.presentation.slides:
+            self.normalize_slide(slide)
+
+    def shape_index(self, slide, refresh=False):
+        """
+        Returns ShapeIndex of slide, building it on first use, and again if `refresh` is set or 
+        the slide's shapes were changed outside the index
+        """
+        shape_index = self._shape_indexes.get(slide.part)
+        if shape_index is None or refresh or not shape_index.is_current():
+            shape_index = self._shape_indexes[slide.part] = ShapeIndex(slide)
+        return shape_index
+
+    def get_slide(self, index):
+        """Returns slide at given index, normalizing it on first access"""
+        return self.normalize_slide(self.presentation.slides[index])
+
     def duplicate_slide(self, index, destination=None):
         """
         Duplicates the slide with the given index. Adds slide to the end of the presentation
         """
-        source = self.presentation.slides[index]
-        destination = destination or self
-        # Adds blank slide to end
-        blank_slide_layout = destination._blank_slide_layout
-        dest = destination.presentation.slides.add_slide(blank_slide_layout)
-
-        # Remove all shapes from the default layout
-        for shape in dest.shapes:
-            remove_shape(shape)
-
-        # Copy all existing shapes
-        copy_shapes(source.shapes, dest)
-
-        # Copy existing references of known type
-        # e.g. hyperlinks
-        known_refs = [
-            "http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink",
-            "http://schemas.openxmlformats.org/officeDocument/2006/relationships/oleObject"
-        ]
-        for rel in _object_rels(source.part):
-            if rel.reltype in known_refs:
-                if rel.is_external:
-                    dest.part.rels.get_or_add_ext_rel(rel.reltype, rel._target)
-                else:
-                    dest.part.rels.get_or_add(rel.reltype, rel._target)
-
-        # Copy all existing shapes
+        with METRICS.timer("duplicate_slide"):
+            return self._duplicate_slide(index, destination or self)
+
+    def _duplicate_slide(self, index, destination):
+        source = self.get_slide(index)
+        # Copy slide XML with all related parts. The slide keeps its layout, which is only added 
+        # to the destination if no identical layout is there yet
+        slide_part = destination._importer.import_slide(source, destination._next_slide_partname())
+        destination._append_slide_part(slide_part)
+        dest = slide_part.slide
+
+        # Copy has the same shape tree, so its index is derived from the source's
+        if source.part in self._shape_indexes:
+            destination._shape_indexes[slide_part] = self._shape_indexes[source.part].copy_for(dest)
+
+        # Copy notes
         if source.has_notes_slide:
             txt = source.notes_slide.notes_text_frame.text
             dest.notes_slide.notes_text_frame.text = txt
 
         return dest
 
+    def slide_prototype(self, index):
+        """Returns compiled prototype of slide at given index, compiling it on first use"""
+        slide = self.get_slide(index)
+        if slide.part not in self._prototypes:
+            self._prototypes[slide.part] = SlidePrototype(slide, self.shape_index(slide))
+        return self._prototypes[slide.part]
+
+    def stamp_slide(self, index):
+        """
+        Duplicates the slide with the given index from its compiled prototype. Adds slide to the end 
+        of the presentation
+        """
+        prototype = self.slide_prototype(index)
+        slide_part = prototype.new_slide_part(self._next_slide_partname())
+        self._append_slide_part(slide_part)
+        # Stamped slide has the prototype's shape tree, so its index is derived from the prototype's
+        self._shape_indexes[slide_part] = prototype.shape_index.copy_for(slide_part.slide)
+        prototype.fill_notes(slide_part.slide)
+        return slide_part.slide
+
+    def extract_slide_payloads(self, slides_to_copy=()):
+        """Returns self-contained payloads of slides with given indices, defaulting to all slides"""
+        if not slides_to_copy:
+            slides_to_copy = range(self.total_slides)
+        return [SlidePayload(self.get_slide(i)) for i in slides_to_copy]
+
+    def add_slide_payload(self, payload):
+        """Adds slide from a SlidePayload to the end of the presentation"""
+        presentation_part = self.presentation.part
+        slide_part = payload.new_slide_part(
+            self._next_slide_partname(),
+            presentation_part.package,
+            self._blank_slide_layout,
+            self._payload_parts,
+        )
+        self._append_slide_part(slide_part)
+        payload.fill_notes(slide_part.slide)
+        return slide_part.slide
+
+    def _copy_template_slide(self):
+        if self.compile_template:
+            return self.stamp_slide(self.template_slide_index)
+        return self.duplicate_slide(self.template_slide_index)
+
+    def _seed_slide_counters(self):
+        """
+        Counts slides and takes the next slide ID above the highest in `sldIdLst`, both O(n). 
+        Slides added by the manager then only increment the counters
+        """
+        xml_slides = self.xml_slides
+        self._slide_count = len(xml_slides)
+        self._next_slide_id = max(self._next_slide_id, xml_slides._next_id)
+        self._last_sld_id = next(reversed(xml_slides), None)
+
+    def _check_slide_counters(self):
+        # Slides added or removed through python-pptx replace the last `p:sldId` the manager added
+        if next(reversed(self.xml_slides), None) is not self._last_sld_id:
+            self._seed_slide_counters()
+
+    def _next_slide_partname(self):
+        # Reading the slides renumbers their partnames by position, see PartnameAllocator
+        self._check_slide_counters()
+        return self._partnames.next_partname("/ppt/slides/slide%d.xml", floor=self._slide_count)
+
+    def _append_slide_part(self, slide_part):
+        """Relates new slide part to the presentation and adds its `p:sldId` to the end"""
+        # Slide is copied from a normalized slide
+        self._normalized.add(slide_part)
+        # Slide part is new so no existing relationship can match it
+        rId = self.presentation.part.rels._add_relationship(RT.SLIDE, slide_part)
+        self._check_slide_counters()
+        self._last_sld_id = self.xml_slides._add_sldId(id=self._next_slide_id, rId=rId)
+        self._next_slide_id += 1
+        self._slide_count += 1
+
     def move_slide(self, old_index, new_index):
         slides = list(self.xml_slides)
         self.xml_slides.remove(slides[old_index])
         self.xml_slides.insert(new_index, slides[old_index])
+        self._seed_slide_counters()
 
     def remove_slide(self, index):
         slides = list(self.xml_slides)
-        self.xml_slides.remove(slides[index]) 
+        self.xml_slides.remove(slides[index])
+        self._seed_slide_counters()
 
     def remove_all_slides(self):
         slides = list(self.xml_slides)
         for slide in slides:
-            self.xml_slides.remove(slide)       
+            self.xml_slides.remove(slide)
+        self._seed_slide_counters()
         
 
     def add_text_to_slide(self, index, text_content, title=""):
         """Adds title and content to slide at given index"""
         
-        dest = self.presentation.slides[index]
+        dest = self.get_slide(index)
+        self._add_text_to_slide(dest, text_content, title)
+
+    def _add_text_to_slide(self, dest, text_content, title=""):
+        """Adds title and content to given slide object"""
+
         # Get title frame and content frame
-        text_frames = []
-        for shape in dest.shapes:
-            if shape.has_text_frame:
-                if 'Title' in shape.name:
-                    title_frame = shape.text_frame
-                else:
-                    text_frames.append(shape.text_frame)
+        shape_index = self.shape_index(dest)
+        title_frame = shape_index.title_shape().text_frame
         # Choose first text frame as target
-        content_frame = text_frames[0]
+        content_frame = shape_index.content_shape().text_frame
         
         # Clear content frame and add text
         content_frame.clear()
@@ -136,60 +311,251 @@ class PresentationManager(object):
         run = p.add_run()
         run.text = title
 
+    def _content_shape(self, slide):
+        """Returns first shape with a text frame that is not the title"""
+        return self.shape_index(slide).content_shape()
+
+    def _text_chunker(self):
+        """
+        Returns function splitting content into chunks for slides copied from the template: 
+        by the lines that fit in the template's content frame if `font_file` is set, 
+        else by MAX_CONTENT_LIMIT characters. Raises ValueError if lines are to be measured and the 
+        template has no content text frame
+        """
+        if not self.font_file:
+            return partial(iter_text_chunks, max_chunk_size=self.MAX_CONTENT_LIMIT)
+
+        template = self.presentation.slides[self.template_slide_index]
+        content_shape = self._content_shape(template)
+        if content_shape is None:
+            raise ValueError(
+                f"Template slide {self.template_slide_index} has no content text frame to fit text in"
+            )
+        geometry = text_frame_geometry(content_shape)
+        scale = self.MEASURE_UNITS_PER_PT
+        metrics = font_metrics(self.font_file, round(geometry.font_size.pt * scale))
+        if isinstance(geometry.line_spacing, float):
+            line_height = geometry.line_spacing * (metrics.ascent + metrics.descent)
+        else:
+            line_height = geometry.line_spacing.pt * scale
+        return partial(
+            iter_text_pages,
+            metrics=metrics,
+            width=geometry.width.pt * scale,
+            height=geometry.height.pt * scale,
+            line_height=line_height,
+            space_before=geometry.space_before.pt * scale,
+        )
+
     def populate_slide(self, content, title=""):
         """Creates slides with given text and title, making more slides if text over limit"""
         
-        duplicate_indices = []
-        chunks = create_text_chunks(content, self.MAX_CONTENT_LIMIT)
+        self.populate_slides([(content, title)])
+
+    def populate_slides(self, items, cancel=None):
+        """
+        Creates slides for every (content, title) pair in `items`, making more slides 
+        for text over limit or, if `font_file` is set, text that does not fit the template's 
+        content frame. New slides are placed just after the template slide, 
+        in the same order as `items`. 
+        If `cancel` is given, e.g. a threading.Event, it is checked before each slide and 
+        CancelledError is raised once it is set, leaving the slides made so far at the end
+        """
 
-        # Create slides for each chunk of text
-        for chunk in chunks:
-            slide_copy = self.duplicate_slide(self.template_slide_index)
-            i = self.presentation.slides.index(slide_copy)
-            duplicate_indices.append(i)
-            self.add_text_to_slide(i, chunk, title)
+        # Chunks are generated lazily, one slide at a time
+        chunker = self._text_chunker()
+        planned = ((chunk, title) for content, title in items for chunk in chunker(content))
 
-        # Move all slides to just after template slide
-        new_index = self.template_slide_index + 1
-        for old_index in duplicate_indices:
-            self.move_slide(old_index, new_index)
-            new_index += 1
+        # Create slides for each chunk of text at the end of the presentation
+        new_slide_ids = []
+        for chunk, title in planned:
+            if cancel is not None and cancel.is_set():
+                raise CancelledError("Populating slides cancelled")
+            slide_copy = self._copy_template_slide()
+            self._add_text_to_slide(slide_copy, chunk, title)
+            new_slide_ids.append(self.xml_slides[-1])
 
+        # Move all slides to just after template slide in a single pass,
+        # chaining each `p:sldId` after the previous one
+        anchor = self.xml_slides[self.template_slide_index]
+        for sld_id in new_slide_ids:
+            anchor.addnext(sld_id)
+            anchor = sld_id
+
+
+    def compact(self):
+        """Drops parts of removed slides and other unused parts. Returns (parts removed, bytes reclaimed)"""
+        removed, reclaimed = remove_unused_parts(self.presentation)
+        METRICS.count("compact.parts_removed", removed)
+        METRICS.count("compact.bytes_reclaimed", reclaimed)
+        logger.info("Removed %d unused parts, reclaimed %d bytes", removed, reclaimed)
+        return removed, reclaimed
+
+    def save(self, filepath=None, remove_template=False, compact=True, compresslevel=None, 
+             store_compressed=True):
+        """
+        Saves presentation to given filepath or writable file object and removes slide used as 
+        template. Returns presentation as bytes if no filepath given. 
+        Unless `compact` is False, parts no longer used by the presentation are left out. XML parts 
+        are deflated at `compresslevel` and, if `store_compressed` is set, already compressed media 
+        is stored without recompressing it
+        """
 
-    def save(self, filepath, remove_template=False):
-        """Saves presentation to given filepath and removes slide used as template"""
+        with METRICS.timer("save", profile=True):
+            if remove_template:
+                logger.info("Removing template %d", self.template_slide_index)
+                self.remove_slide(self.template_slide_index)
+            # Normalize any slides not yet used in lazy mode
+            self.normalize_all_slides()
+            if compact:
+                with METRICS.timer("save.compact"):
+                    self.compact()
 
-        if remove_template:
-            print("Removing template", self.template_slide_index)
-            self.remove_slide(self.template_slide_index)
-        self.presentation.save(filepath)
-        print("Saved presentation to:", filepath)
+            output = filepath if filepath is not None else BytesIO()
+            with METRICS.timer("save.write"):
+                write_package(self.presentation.part.package, output, compresslevel, store_compressed)
+        if filepath is None:
+            logger.info("Saved presentation to bytes")
+            return output.getvalue()
+        logger.info("Saved presentation to: %s", filepath)
 
 
     @classmethod
     def copy_slide_to_other_presentation(cls, source, dest_filepath, slides_to_copy=[]):
+        cls.merge_presentations([(source, slides_to_copy)], dest_filepath)
+
+    @classmethod
+    def merge_presentations(cls, sources, dest_filepath):
+        """
+        Copies slides from each (source, slide indices) pair in `sources` to the presentation 
+        at `dest_filepath`, keeping it in memory and saving it once. Sources can be file paths or 
+        PresentationManager objects, and no slide indices means all slides.
+        Returns list of per-source timings
+        """
         # Load presentation
         destination = PresentationManager(dest_filepath)
-        # Copy presentation size if destination is empty
-        if destination.total_slides == 0:
-            height, width = source.presentation.slide_height, source.presentation.slide_width
-            destination.set_slide_size(height, width)
-        # If no slide numbers given, default to all slides
-        if not slides_to_copy:
-            slides_to_copy = range(source.total_slides)
-        try:
-            for i in slides_to_copy:
-                source.duplicate_slide(i, destination)
-            destination.save(dest_filepath)
-            destination = Presentation(dest_filepath)
-            destination.save(dest_filepath)
-        except Exception:
-            traceback.print_exc()   
+        timings = []
+        for source, slides_to_copy in sources:
+            timing = {"source": str(getattr(source, "file_path", source)), "slides": 0}
+            start = time.perf_counter()
+            try:
+                # Only slides being copied need loading and normalizing
+                if not isinstance(source, PresentationManager):
+                    source, slides_to_copy = _open_source(source, slides_to_copy)
+                timing["load_seconds"] = time.perf_counter() - start
 
+                # Copy presentation size if destination is empty
+                if destination.total_slides == 0:
+                    height, width = source.presentation.slide_height, source.presentation.slide_width
+                    destination.set_slide_size(height, width)
+                # If no slide numbers given, default to all slides
+                if not slides_to_copy:
+                    slides_to_copy = range(source.total_slides)
+
+                start = time.perf_counter()
+                for i in slides_to_copy:
+                    source.duplicate_slide(i, destination)
+                    timing["slides"] += 1
+                timing["copy_seconds"] = time.perf_counter() - start
+            except Exception as e:
+                logger.exception("Could not copy slides from %s", timing["source"])
+                timing["error"] = repr(e)
+            timings.append(timing)
+
+        start = time.perf_counter()
+        destination.save(dest_filepath)
+        save_seconds = time.perf_counter() - start
+
+        for timing in timings:
+            logger.info(
+                "%s: %d slides, load %.3fs, copy %.3fs",
+                timing["source"],
+                timing["slides"],
+                timing.get("load_seconds", 0),
+                timing.get("copy_seconds", 0),
+            )
+        logger.info("Saved %d slides in %.3fs", destination.total_slides, save_seconds)
+        return timings
+
+    @classmethod
+    def assemble_presentations(cls, sources, dest_filepath, max_workers=None):
+        """
+        Copies slides from each (source file path, slide indices) pair in `sources` to the 
+        presentation at `dest_filepath`. Source decks are opened, normalized and extracted into 
+        slide payloads in worker processes, the destination only adds the payloads and is saved once.
+        Returns list of per-source timings
+        """
+        destination = PresentationManager(dest_filepath)
+        timings = []
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            futures = [
+                executor.submit(_extract_slide_payloads, source, slides_to_copy)
+                for source, slides_to_copy in sources
+            ]
+            # Add payloads in source order as workers finish
+            for (source, _), future in zip(sources, futures):
+                timing = {"source": str(source), "slides": 0}
+                try:
+                    slide_size, payloads, timing["extract_seconds"] = future.result()
+                    # Copy presentation size if destination is empty
+                    if destination.total_slides == 0:
+                        destination.set_slide_size(*slide_size)
+                    start = time.perf_counter()
+                    for payload in payloads:
+                        destination.add_slide_payload(payload)
+                        timing["slides"] += 1
+                    timing["copy_seconds"] = time.perf_counter() - start
+                except Exception as e:
+                    logger.exception("Could not copy slides from %s", timing["source"])
+                    timing["error"] = repr(e)
+                timings.append(timing)
+
+        start = time.perf_counter()
+        destination.save(dest_filepath)
+        save_seconds = time.perf_counter() - start
+
+        for timing in timings:
+            logger.info(
+                "%s: %d slides, extract %.3fs, copy %.3fs",
+                timing["source"],
+                timing["slides"],
+                timing.get("extract_seconds", 0),
+                timing.get("copy_seconds", 0),
+            )
+        logger.info("Saved %d slides in %.3fs", destination.total_slides, save_seconds)
+        return timings
 
     def _analyse_slide_elements(self, index, description=None):
-        slide = self.presentation.slides[index]
+        slide = self.get_slide(index)
         if description:
             print("*"*40, description, "*" * 40, sep="\n")
         for shape in slide.shapes:
             print_shape_type(shape)
+
+
+def _extract_slide_payloads(source_path, slides_to_copy):
+    """
+    Worker for `PresentationManager.assemble_presentations`. Returns (slide size, payloads, 
+    seconds taken) for given slides of the presentation at `source_path`
+    """
+    start = time.perf_counter()
+    source, slides_to_copy = _open_source(source_path, slides_to_copy)
+    payloads = source.extract_slide_payloads(slides_to_copy)
+    slide_size = (source.presentation.slide_height, source.presentation.slide_width)
+    return slide_size, payloads, time.perf_counter() - start
+
+
+def _open_source(source_path, slides_to_copy):
+    """
+    Opens source deck with only the slides to copy, if any given. Returns (PresentationManager, 
+    indices of slides to copy in the opened deck). Negative indices count from the last slide, and 
+    IndexError is raised for indices out of range before anything is loaded
+    """
+    if not slides_to_copy:
+        return PresentationManager(source_path, lazy_normalization=True), slides_to_copy
+    total = slide_count(source_path)
+    slides_to_copy = [i % total for i in _check_slide_indices(slides_to_copy, total)]
+    loaded = sorted(set(slides_to_copy))
+    source = PresentationManager(source_path, lazy_normalization=True, only_slides=loaded)
+    positions = {index: position for position, index in enumerate(loaded)}
+    return source, [positions[i] for i in slides_to_copy]
@@ -0,0 +1,55 @@
+import os
+import sys
+import collections.abc  # noqa: F401, python-pptx 0.6.21 expects it imported on Python 3.10+
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pptx import Presentation  # noqa: E402
+
+from benchmark import SLIDE_BUILDERS  # noqa: E402
+from common import DIAGRAM_CACHE  # noqa: E402
+from metrics import METRICS  # noqa: E402
+
+
+def make_deck(path, kinds):
+    """Saves a deck with one slide of each kind in `kinds`, see `benchmark.SLIDE_BUILDERS`"""
+    presentation = Presentation()
+    for i, kind in enumerate(kinds):
+        SLIDE_BUILDERS[kind](presentation, i)
+    presentation.save(path)
+    return str(path)
+
+
+def titled_deck(path, count, layout=1):
+    """Saves a deck of `count` slides titled "Slide 0", "Slide 1", ..."""
+    presentation = Presentation()
+    for i in range(count):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[layout])
+        slide.shapes.title.text = f"Slide {i}"
+    presentation.save(path)
+    return str(path)
+
+
+def slide_titles(presentation):
+    return [slide.shapes.title.text for slide in presentation.slides]
+
+
+def partnames(presentation):
+    return [part.partname for part in presentation.part.package.iter_parts()]
+
+
+@pytest.fixture(autouse=True)
+def _reset_shared_state():
+    METRICS.reset()
+    DIAGRAM_CACHE.clear()
+    yield
+
+
+@pytest.fixture
+def mixed_deck(tmp_path):
+    return make_deck(
+        tmp_path / "mixed.pptx",
+        ["text", "picture", "group", "chart", "table", "smartart", "ole_photo"],
+    )
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import pytest
+from pptx import Presentation
+
+from asyncservice import AsyncPresentationService
+from conftest import slide_titles, titled_deck
+
+
+@pytest.fixture
+def template(tmp_path):
+    with open(titled_deck(tmp_path / "template.pptx", 2), "rb") as f:
+        return f.read()
+
+
+def test_build_deck(template):
+    service = AsyncPresentationService()
+    blob = asyncio.run(service.build_deck(template, [("text", "A"), ("more", "B")]))
+    assert slide_titles(Presentation(BytesIO(blob))) == ["Slide 0", "Slide 1", "A", "B"]
+
+
+def test_merge_decks(template):
+    service = AsyncPresentationService()
+    blob = asyncio.run(service.merge_decks([(template, [1]), (template, None)]))
+    assert slide_titles(Presentation(BytesIO(blob))) == ["Slide 1", "Slide 0", "Slide 1"]
+
+
+def test_manager_operations(template):
+    async def run():
+        service = AsyncPresentationService()
+        manager = await service.load(template)
+        await service.populate(manager, [("text", "A")])
+        destination = await service.load()
+        await service.copy(manager, destination, [2])
+        return await service.save(destination)
+
+    blob = asyncio.run(run())
+    assert slide_titles(Presentation(BytesIO(blob))) == ["A"]
+
+
+def test_manager_operations_need_threads():
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        service = AsyncPresentationService(executor=executor)
+        with pytest.raises(TypeError):
+            asyncio.run(service.load())
+
+
+def test_cancelled_job_keeps_its_slot_until_it_stops():
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0, "cancelled": False}
+
+    def job(cancel=None):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        # Stops at its next check once cancelled, like a job between slides
+        for _ in range(20):
+            if cancel.is_set():
+                state["cancelled"] = True
+                break
+            time.sleep(0.01)
+        with lock:
+            state["running"] -= 1
+
+    async def run():
+        service = AsyncPresentationService(max_in_flight=1)
+        first = asyncio.create_task(service._run(job))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        second = asyncio.create_task(service._run(job))
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await second
+
+    asyncio.run(run())
+    assert state["cancelled"]
+    assert state["peak"] == 1
@@ -0,0 +1,27 @@
+import io
+import json
+
+from benchmark import print_results, print_suite_report, run_suite
+
+
+def test_suite_report_is_json(tmp_path):
+    report = run_suite(slides_per_kind=1, populate_chars=2000, work_dir=str(tmp_path))
+    assert [result["operation"] for result in report["results"]] == [
+        "load", "duplicate_slide", "populate_slide", "save", "copy_slide_to_other_presentation"
+    ]
+    assert json.loads(json.dumps(report))["deck"]["slides"] == report["deck"]["slides"]
+
+
+def test_tables_written_to_given_file(capsys):
+    report = {
+        "deck": {"slides": 7},
+        "results": [{"operation": "load", "seconds": 0.5, "peak_rss_bytes": 2 ** 20}],
+    }
+    tables = io.StringIO()
+    print_suite_report(report, file=tables)
+    print_results("populate_slides", [(10, 1.0, 100.0)], file=tables)
+
+    # stdout is left to the JSON report
+    assert capsys.readouterr().out == ""
+    assert "suite (7 slides)" in tables.getvalue()
+    assert "populate_slides" in tables.getvalue()
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pptx import Presentation
+from pptx.chart.data import CategoryChartData, XyChartData
+from pptx.enum.chart import XL_CHART_TYPE
+from pptx.util import Inches
+
+import utils
+from metrics import METRICS
+from utils import (
+    chart_cache_to_dataframe,
+    chart_to_dataframe,
+    clone_chart,
+    dataframes_to_chart_data,
+    find_charts,
+    update_charts,
+)
+
+
+@pytest.fixture
+def slide():
+    presentation = Presentation()
+    return presentation.slides.add_slide(presentation.slide_layouts[6])
+
+
+def add_category_chart(slide, name=None, series=(("S1", (1, 2)), ("S2", (3, 4)))):
+    chart_data = CategoryChartData()
+    chart_data.categories = ["a", "b"]
+    for series_name, values in series:
+        chart_data.add_series(series_name, values)
+    frame = slide.shapes.add_chart(
+        XL_CHART_TYPE.COLUMN_CLUSTERED, 0, 0, Inches(4), Inches(3), chart_data
+    )
+    if name:
+        frame.name = name
+    return frame
+
+
+def new_slide(slide):
+    presentation = slide.part.package.presentation_part.presentation
+    return presentation.slides.add_slide(presentation.slide_layouts[6])
+
+
+def test_clone_chart_copies_parts(slide):
+    frame = add_category_chart(slide, "Sales")
+    dest = new_slide(slide)
+
+    copy = clone_chart(frame, dest)
+    assert METRICS.counters["clone_chart.copied"] == 1
+    assert copy.name == "Sales"
+    assert copy.chart_part is not frame.chart_part
+    assert copy.chart_part.blob == frame.chart_part.blob
+    workbook = copy.chart_part.chart_workbook.xlsx_part
+    assert workbook is not frame.chart_part.chart_workbook.xlsx_part
+    assert workbook.blob == frame.chart_part.chart_workbook.xlsx_part.blob
+    assert chart_to_dataframe(copy).equals(chart_to_dataframe(frame))
+
+
+def test_clone_chart_rebuilds_charts_it_cannot_copy(slide, monkeypatch):
+    frame = add_category_chart(slide)
+    dest = new_slide(slide)
+
+    def fail(graphical_frame, dest):
+        raise ValueError
+
+    monkeypatch.setattr(utils, "_copy_chart_parts", fail)
+    with pytest.warns(UserWarning, match="rebuilding"):
+        copy = clone_chart(frame, dest)
+    assert METRICS.counters["clone_chart.rebuilt"] == 1
+    assert list(copy.chart.plots[0].categories) == ["a", "b"]
+    assert chart_to_dataframe(copy).equals(chart_to_dataframe(frame))
+
+
+def test_chart_cache_matches_workbook(slide):
+    frame = add_category_chart(slide)
+    cached = chart_cache_to_dataframe(frame)
+    assert list(cached.columns) == ["S1", "S2"]
+    assert cached["S1"].tolist() == [1, 2]
+    assert cached["S2"].tolist() == [3, 4]
+    assert np.array_equal(cached.to_numpy(), chart_to_dataframe(frame).to_numpy())
+
+
+def test_chart_cache_series_with_different_categories(slide):
+    chart_data = XyChartData()
+    for name, points in (("A", [(1, 10), (2, 20), (3, 30)]), ("B", [(5, 50), (6, 60), (7, 70)])):
+        series = chart_data.add_series(name)
+        for x, y in points:
+            series.add_data_point(x, y)
+    frame = slide.shapes.add_chart(
+        XL_CHART_TYPE.XY_SCATTER, 0, 0, Inches(4), Inches(3), chart_data
+    )
+
+    cached = chart_cache_to_dataframe(frame)
+    # Same number of points, but at other x values, so no shared index
+    assert list(cached.columns) == ["series", "category", "value"]
+    b = cached[cached["series"] == "B"]
+    assert b["category"].tolist() == [5, 6, 7]
+    assert b["value"].tolist() == [50, 60, 70]
+
+
+def test_find_charts(slide):
+    add_category_chart(slide, "Sales")
+    add_category_chart(slide, "Costs")
+    assert set(find_charts(slide.part.package.presentation_part.presentation)) == {
+        (0, "Sales"), (0, "Costs")
+    }
+
+
+def test_find_charts_rejects_duplicate_names(slide):
+    add_category_chart(slide, "Chart")
+    add_category_chart(slide, "Chart")
+    add_category_chart(slide, "Other")
+    presentation = slide.part.package.presentation_part.presentation
+
+    with pytest.raises(ValueError):
+        find_charts(presentation)
+    with pytest.raises(ValueError):
+        update_charts(presentation, {(0, "Chart"): pd.DataFrame({"S1": [5, 6]}, index=["a", "b"])})
+    # Only charts asked for need to be unique
+    assert (0, "Other") in find_charts(presentation, [(0, "Other")])
+
+
+def test_update_charts(slide):
+    add_category_chart(slide, "Sales")
+    presentation = slide.part.package.presentation_part.presentation
+    df = pd.DataFrame({"X": [7.0, 8.0, 9.0], "Y": [1.0, np.nan, 3.0]}, index=["p", "q", "r"])
+
+    with pytest.warns(UserWarning, match="NaN"):
+        update_charts(presentation, {(0, "Sales"): df})
+    frame = find_charts(presentation)[(0, "Sales")]
+    plot = frame.chart.plots[0]
+    assert list(plot.categories) == ["p", "q", "r"]
+    assert [series.name for series in plot.series] == ["X", "Y"]
+    assert list(plot.series[0].values) == [7.0, 8.0, 9.0]
+
+
+def test_chart_data_from_object_columns():
+    df = pd.DataFrame({"A": ["1", "2.5", None], "B": [1, "x", 3]}, index=["p", "q", "r"])
+    with pytest.warns(UserWarning, match="2 values"):
+        (chart_data,) = dataframes_to_chart_data([df])
+    assert [series.values for series in chart_data] == [[1.0, 2.5, None], [1.0, None, 3.0]]
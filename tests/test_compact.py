@@ -0,0 +1,44 @@
+from io import BytesIO
+
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+from conftest import make_deck, partnames
+from metrics import METRICS
+from presentationmanager import PresentationManager
+from utils import remove_shape
+
+
+def test_save_drops_parts_of_removed_slides(tmp_path):
+    manager = PresentationManager(make_deck(tmp_path / "deck.pptx", ["text", "picture", "chart"]))
+    manager.remove_slide(2)
+    manager.remove_slide(1)
+
+    saved = Presentation(BytesIO(manager.save()))
+    names = partnames(saved)
+    assert len(saved.slides) == 1
+    assert not [name for name in names if name.startswith(("/ppt/media/", "/ppt/charts/"))]
+    assert METRICS.counters["compact.parts_removed"] >= 4
+    assert METRICS.counters["compact.bytes_reclaimed"] > 0
+
+
+def test_save_without_compact_keeps_parts(tmp_path):
+    manager = PresentationManager(make_deck(tmp_path / "deck.pptx", ["text", "picture"]))
+    manager.remove_slide(1)
+
+    saved = Presentation(BytesIO(manager.save(compact=False)))
+    assert len(saved.slides) == 1
+    assert any(name.startswith("/ppt/media/") for name in partnames(saved))
+
+
+def test_compact_drops_parts_of_removed_shapes(tmp_path):
+    manager = PresentationManager(make_deck(tmp_path / "deck.pptx", ["picture", "picture"]))
+    slide = manager.presentation.slides[0]
+    for shape in [shape for shape in slide.shapes if shape.shape_type == MSO_SHAPE_TYPE.PICTURE]:
+        remove_shape(shape)
+
+    removed, reclaimed = manager.compact()
+    assert removed == 1 and reclaimed > 0
+    # The other slide's picture is still there
+    assert len([name for name in partnames(manager.presentation) if name.startswith("/ppt/media/")]) == 1
+    assert len(Presentation(BytesIO(manager.save())).slides) == 2
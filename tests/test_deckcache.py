@@ -0,0 +1,54 @@
+import os
+
+from deckcache import DeckCache
+from metrics import METRICS
+from presentationmanager import PresentationManager
+
+
+def test_get_and_put(tmp_path):
+    cache = DeckCache(str(tmp_path / "cache"))
+    key = cache.key(b"source")
+    assert cache.get(key) is None
+    cache.put(key, b"normalized")
+    assert cache.get(key) == b"normalized"
+    assert METRICS.counters["deck_cache.miss"] == 1
+    assert METRICS.counters["deck_cache.hit"] == 1
+    # No temporary files are left behind
+    assert os.listdir(cache.directory) == [key + DeckCache.SUFFIX]
+
+
+def test_key_depends_on_content():
+    assert DeckCache.key(b"a") == DeckCache.key(b"a")
+    assert DeckCache.key(b"a") != DeckCache.key(b"b")
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = DeckCache(str(tmp_path / "cache"), max_bytes=25)
+    for i, key in enumerate(["a", "b"]):
+        cache.put(key, b"x" * 10)
+        # Modification times must differ for the order to be known
+        os.utime(cache._path(key), (i, i))
+    cache.get("a")
+    cache.put("c", b"x" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert METRICS.counters["deck_cache.evicted"] == 1
+
+    cache.clear()
+    assert os.listdir(cache.directory) == []
+
+
+def test_normalized_deck_loaded_from_cache(tmp_path, mixed_deck):
+    cache = DeckCache(str(tmp_path / "cache"))
+    first = PresentationManager(mixed_deck, cache=cache)
+    assert METRICS.counters["deck_cache.miss"] == 1
+    assert len(os.listdir(cache.directory)) == 1
+
+    second = PresentationManager(mixed_deck, cache=cache)
+    assert METRICS.counters["deck_cache.hit"] == 1
+    assert second.total_slides == first.total_slides
+    assert [slide.part.blob for slide in second.presentation.slides] == [
+        slide.part.blob for slide in first.presentation.slides
+    ]
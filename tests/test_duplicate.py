@@ -0,0 +1,47 @@
+import zipfile
+from io import BytesIO
+
+from pptx import Presentation
+
+from conftest import make_deck, partnames
+from presentationmanager import PresentationManager
+
+
+def saved_names(blob):
+    with zipfile.ZipFile(BytesIO(blob)) as zipf:
+        return zipf.namelist()
+
+
+def related_parts(slide):
+    return {rel.target_part for rel in slide.part.rels._rels.values() if not rel.is_external}
+
+
+def test_duplicate_slide_to_other_presentation(mixed_deck):
+    source = PresentationManager(mixed_deck, lazy_normalization=True)
+    destination = PresentationManager()
+    for i in range(source.total_slides):
+        source.duplicate_slide(i, destination)
+
+    blob = destination.save()
+    names = saved_names(blob)
+    assert len(names) == len(set(names))
+    reopened = Presentation(BytesIO(blob))
+    assert len(reopened.slides) == source.total_slides
+    # SmartArt and OLE photos were converted to shapes
+    assert not any("/diagrams/" in name or "/embeddings/oleObject" in name for name in names)
+
+
+def test_duplicate_slide_shares_media(tmp_path):
+    manager = PresentationManager(make_deck(tmp_path / "deck.pptx", ["picture"]))
+    copy = manager.duplicate_slide(0)
+    original = manager.presentation.slides[0]
+    assert copy.part is not original.part
+    assert related_parts(copy) == related_parts(original)
+
+
+def test_duplicate_normalized_smartart_adds_only_slides(tmp_path):
+    manager = PresentationManager(make_deck(tmp_path / "deck.pptx", ["smartart"]))
+    before = len(partnames(manager.presentation))
+    for _ in range(3):
+        manager.duplicate_slide(0)
+    assert len(partnames(manager.presentation)) == before + 3
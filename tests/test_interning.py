@@ -0,0 +1,34 @@
+from pptx import Presentation
+from pptx.opc.constants import CONTENT_TYPE as CT
+
+from metrics import METRICS
+from utils import PartInterner, clone_slide_master, part_interner
+
+THEME = (
+    '<a:theme xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" name="T"{}>'
+    "<a:themeElements/></a:theme>"
+)
+
+
+def theme_parts(presentation):
+    return [
+        part for part in presentation.part.package.iter_parts() if part.content_type == CT.OFC_THEME
+    ]
+
+
+def test_key_ignores_random_id():
+    key = PartInterner.key(CT.OFC_THEME, THEME.format(' id="1"').encode())
+    assert key == PartInterner.key(CT.OFC_THEME, THEME.format(' id="2"').encode())
+    assert key != PartInterner.key(CT.OFC_CHART_STYLE, THEME.format("").encode())
+
+
+def test_cloned_masters_share_theme():
+    presentation = Presentation()
+    before = len(theme_parts(presentation))
+    for _ in range(3):
+        clone_slide_master(presentation, presentation.slide_masters[0])
+
+    assert len(presentation.slide_masters) == 4
+    assert len(theme_parts(presentation)) == before
+    assert METRICS.counters["intern.reused"] == 3
+    assert part_interner(presentation) is part_interner(presentation.slide_masters[1])
@@ -0,0 +1,41 @@
+from pptx import Presentation
+
+from conftest import titled_deck
+from metrics import METRICS
+from presentationmanager import PresentationManager
+
+
+def layout_counts(presentation):
+    return len(presentation.slide_masters), len(presentation.slide_layouts)
+
+
+def test_imported_slides_keep_matching_layouts(tmp_path):
+    source = titled_deck(tmp_path / "source.pptx", 2, layout=5)
+    dest = str(tmp_path / "dest.pptx")
+
+    PresentationManager.merge_presentations([(source, None), (source, [0])], dest)
+    merged = Presentation(dest)
+    assert layout_counts(merged) == layout_counts(Presentation(source))
+    assert [slide.slide_layout.name for slide in merged.slides] == ["Title Only"] * 3
+    # Matched once per layout of each source deck
+    assert METRICS.counters["import_layout.reused"] == 2
+    assert "import_layout.cloned" not in METRICS.counters
+
+
+def test_changed_layout_cloned_once_under_existing_master(tmp_path):
+    presentation = Presentation()
+    layout = presentation.slide_layouts[1]
+    layout.name = "Custom"
+    presentation.slides.add_slide(layout).shapes.title.text = "Custom slide"
+    presentation.save(tmp_path / "custom.pptx")
+    source = str(tmp_path / "custom.pptx")
+    dest = str(tmp_path / "dest.pptx")
+    Presentation().save(dest)
+
+    PresentationManager.merge_presentations([(source, None), (source, None)], dest)
+    merged = Presentation(dest)
+    masters, layouts = layout_counts(merged)
+    assert (masters, layouts) == (1, 12)
+    assert [slide.slide_layout.name for slide in merged.slides] == ["Custom", "Custom"]
+    assert merged.slides[0].slide_layout.part is merged.slides[1].slide_layout.part
+    assert METRICS.counters["import_layout.cloned"] == 1
@@ -0,0 +1,76 @@
+from io import BytesIO
+
+import pytest
+from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+
+from conftest import partnames, slide_titles, titled_deck
+from presentationmanager import PresentationManager
+from utils import open_slides, slide_count, write_package
+
+
+def test_slide_count(tmp_path):
+    assert slide_count(titled_deck(tmp_path / "deck.pptx", 4)) == 4
+
+
+def test_open_slides_loads_only_given_slides(mixed_deck):
+    full = Presentation(mixed_deck)
+    presentation = open_slides(mixed_deck, [1, 4])
+
+    assert [slide.part.blob for slide in presentation.slides] == [
+        full.slides[1].part.blob, full.slides[4].part.blob
+    ]
+    # Media of the picture slide is loaded, embeddings of the chart and OLE slides are not
+    loaded = set(partnames(presentation))
+    assert any(name.startswith("/ppt/media/") for name in loaded)
+    assert not any(name.startswith("/ppt/embeddings/") for name in loaded)
+
+
+def test_open_slides_round_trip(mixed_deck):
+    presentation = open_slides(mixed_deck, [0, 4])
+    output = BytesIO()
+    write_package(presentation.part.package, output)
+
+    reopened = Presentation(BytesIO(output.getvalue()))
+    assert slide_titles(reopened) == ["Text slide 0", "Table slide 4"]
+    assert len(reopened.slides[1].shapes[1].table.rows) == 8
+
+
+def test_open_slides_negative_indices(tmp_path):
+    deck = titled_deck(tmp_path / "deck.pptx", 3)
+    assert slide_titles(open_slides(deck, [-1])) == ["Slide 2"]
+
+
+@pytest.mark.parametrize("indices", [[3], [-4]])
+def test_open_slides_index_out_of_range(tmp_path, indices):
+    deck = titled_deck(tmp_path / "deck.pptx", 3)
+    with pytest.raises(IndexError):
+        open_slides(deck, indices)
+
+
+def test_open_slides_drops_links_to_skipped_slides(tmp_path):
+    presentation = Presentation()
+    for i in range(3):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+        slide.shapes.title.text = f"Slide {i}"
+    slide = presentation.slides[2]
+    rId = slide.part.relate_to(presentation.slides[0].part, RT.SLIDE)
+    run = slide.shapes.title.text_frame.paragraphs[0].runs[0]
+    run._r.get_or_add_rPr().add_hlinkClick(rId).set("action", "ppaction://hlinksldjump")
+    presentation.save(tmp_path / "deck.pptx")
+
+    loaded = open_slides(str(tmp_path / "deck.pptx"), [2])
+    slide = loaded.slides[0]
+    assert "hlinkClick" not in slide.part.blob.decode()
+    assert rId not in slide.part.rels
+    assert slide.shapes.title.text == "Slide 2"
+
+
+def test_merge_with_negative_and_invalid_indices(tmp_path):
+    source = titled_deck(tmp_path / "source.pptx", 3)
+    dest = str(tmp_path / "dest.pptx")
+
+    timings = PresentationManager.merge_presentations([(source, [-1, 0]), (source, [5])], dest)
+    assert slide_titles(Presentation(dest)) == ["Slide 2", "Slide 0"]
+    assert timings[0]["slides"] == 2
+    assert "IndexError" in timings[1]["error"]
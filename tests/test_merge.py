@@ -0,0 +1,77 @@
+import pickle
+
+from pptx import Presentation
+from pptx.util import Inches
+
+from conftest import make_deck, partnames, slide_titles, titled_deck
+from presentationmanager import PresentationManager
+
+
+def test_merge_presentations(tmp_path):
+    first = titled_deck(tmp_path / "first.pptx", 3)
+    second = PresentationManager(titled_deck(tmp_path / "second.pptx", 2))
+    dest = str(tmp_path / "dest.pptx")
+
+    timings = PresentationManager.merge_presentations([(first, [2, 0]), (second, None)], dest)
+    assert slide_titles(Presentation(dest)) == ["Slide 2", "Slide 0", "Slide 0", "Slide 1"]
+    assert [timing["slides"] for timing in timings] == [2, 2]
+    assert all("error" not in timing for timing in timings)
+
+
+def test_merge_presentations_appends_to_existing_deck(tmp_path):
+    dest = titled_deck(tmp_path / "dest.pptx", 1)
+    source = titled_deck(tmp_path / "source.pptx", 2)
+    PresentationManager.copy_slide_to_other_presentation(source, dest, [1])
+    assert slide_titles(Presentation(dest)) == ["Slide 0", "Slide 1"]
+
+
+def test_merge_presentations_copies_slide_size_to_empty_deck(tmp_path):
+    presentation = Presentation()
+    presentation.slide_width, presentation.slide_height = Inches(13.333), Inches(7.5)
+    presentation.slides.add_slide(presentation.slide_layouts[6])
+    presentation.save(tmp_path / "wide.pptx")
+    dest = str(tmp_path / "dest.pptx")
+
+    PresentationManager.merge_presentations([(str(tmp_path / "wide.pptx"), None)], dest)
+    merged = Presentation(dest)
+    assert (merged.slide_width, merged.slide_height) == (Inches(13.333), Inches(7.5))
+
+
+def test_merge_presentations_skips_failing_source(tmp_path):
+    source = titled_deck(tmp_path / "source.pptx", 1)
+    broken = tmp_path / "broken.pptx"
+    broken.write_bytes(b"not a zip file")
+    dest = str(tmp_path / "dest.pptx")
+
+    timings = PresentationManager.merge_presentations(
+        [(str(broken), [0]), (source, None)], dest
+    )
+    assert "error" in timings[0]
+    assert slide_titles(Presentation(dest)) == ["Slide 0"]
+
+
+def test_assemble_presentations(mixed_deck, tmp_path):
+    second = titled_deck(tmp_path / "second.pptx", 3)
+    dest = str(tmp_path / "dest.pptx")
+
+    timings = PresentationManager.assemble_presentations(
+        [(mixed_deck, [0, 3]), (second, [2, 1])], dest, max_workers=2
+    )
+    assert [timing["slides"] for timing in timings] == [2, 2]
+    merged = Presentation(dest)
+    assert slide_titles(merged) == ["Text slide 0", "Chart slide 3", "Slide 2", "Slide 1"]
+    chart = next(shape for shape in merged.slides[1].shapes if shape.has_chart).chart
+    assert list(chart.plots[0].categories) == ["Q1", "Q2", "Q3", "Q4"]
+
+
+def test_slide_payloads_store_identical_media_once(tmp_path):
+    deck = make_deck(tmp_path / "deck.pptx", ["picture"])
+    payloads = PresentationManager(deck).extract_slide_payloads([0, 0, 0])
+    # Payloads cross process boundaries
+    payloads = pickle.loads(pickle.dumps(payloads))
+
+    destination = PresentationManager()
+    for payload in payloads:
+        destination.add_slide_payload(payload)
+    media = {name for name in partnames(destination.presentation) if name.startswith("/ppt/media/")}
+    assert len(media) == 1
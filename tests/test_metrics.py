@@ -0,0 +1,69 @@
+import pytest
+
+from metrics import MetricEvent, Metrics
+
+
+def test_timer_and_counters():
+    metrics = Metrics()
+    with metrics.timer("load"):
+        pass
+    with metrics.timer("load"):
+        pass
+    metrics.count("parts", 3)
+    metrics.count("parts")
+
+    summary = metrics.summary()
+    calls, seconds = summary["timings"]["load"]
+    assert calls == 2 and seconds >= 0
+    assert summary["counters"] == {"parts": 4}
+
+    metrics.reset()
+    assert metrics.summary() == {"timings": {}, "counters": {}}
+
+
+def test_timer_records_on_error():
+    metrics = Metrics()
+    with pytest.raises(RuntimeError):
+        with metrics.timer("save"):
+            raise RuntimeError
+    assert metrics.calls["save"] == 1
+
+
+def test_hooks_receive_events():
+    events = []
+    metrics = Metrics(hooks=[events.append])
+    metrics.count("hit", kind="chart")
+    metrics.record("copy", 0.5)
+    assert events == [
+        MetricEvent("counter", "hit", 1, {"kind": "chart"}),
+        MetricEvent("timing", "copy", 0.5, {}),
+    ]
+
+    metrics.remove_hook(events.append)
+    metrics.count("hit")
+    assert len(events) == 2
+
+
+def test_failing_hook_does_not_break_recording():
+    def hook(event):
+        raise ValueError
+
+    metrics = Metrics(hooks=[hook])
+    metrics.count("hit")
+    assert metrics.counters["hit"] == 1
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "tracemalloc"])
+def test_capture_profiles_top_level_phases(mode):
+    metrics = Metrics(capture_mode=mode)
+    with metrics.timer("load", profile=True):
+        sum(range(1000))
+    with metrics.timer("inner"):
+        pass
+    assert list(metrics.profiles) == ["load"]
+    assert metrics.profiles["load"]
+
+
+def test_invalid_capture_mode():
+    with pytest.raises(ValueError):
+        Metrics(capture_mode="perf")
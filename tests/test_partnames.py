@@ -0,0 +1,44 @@
+from io import BytesIO
+
+from pptx import Presentation
+
+from conftest import partnames, titled_deck
+from presentationmanager import PresentationManager
+from utils import PartnameAllocator, partname_allocator
+
+
+def test_allocator_counts_above_existing_partnames():
+    presentation = Presentation()
+    for _ in range(2):
+        presentation.slides.add_slide(presentation.slide_layouts[6])
+    allocator = PartnameAllocator(presentation.part.package)
+
+    assert allocator.next_partname("/ppt/slides/slide%d.xml") == "/ppt/slides/slide3.xml"
+    assert allocator.next_partname("/ppt/slides/slide%d.xml") == "/ppt/slides/slide4.xml"
+    assert allocator.next_partname("/ppt/slides/slide%d.xml", floor=9) == "/ppt/slides/slide10.xml"
+    # Templates sharing a prefix share numbering
+    assert allocator.next_partname("/ppt/media/image%d.png") == "/ppt/media/image1.png"
+    assert allocator.next_partname("/ppt/media/image%d.jpeg") == "/ppt/media/image2.jpeg"
+
+
+def test_package_partnames_come_from_allocator():
+    presentation = Presentation()
+    allocator = partname_allocator(presentation)
+    assert partname_allocator(presentation.slides.add_slide(presentation.slide_layouts[6])) is allocator
+    assert presentation.part.package.next_partname("/ppt/charts/chart%d.xml") == "/ppt/charts/chart1.xml"
+    assert allocator.next_partname("/ppt/charts/chart%d.xml") == "/ppt/charts/chart2.xml"
+
+
+def test_slides_added_with_python_pptx_keep_names_and_ids_unique(tmp_path):
+    manager = PresentationManager(titled_deck(tmp_path / "deck.pptx", 2), template_slide_index=0)
+    presentation = manager.presentation
+    for _ in range(3):
+        presentation.slides.add_slide(presentation.slide_layouts[6])
+        manager.duplicate_slide(0)
+
+    slide_ids = [sld_id.id for sld_id in manager.xml_slides]
+    assert len(slide_ids) == len(set(slide_ids)) == 8
+    names = partnames(presentation)
+    assert len(names) == len(set(names))
+    blob = manager.save(compact=False)
+    assert len(Presentation(BytesIO(blob)).slides) == 8
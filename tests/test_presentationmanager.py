@@ -0,0 +1,92 @@
+import threading
+from concurrent.futures import CancelledError
+from io import BytesIO
+
+import pytest
+from pptx import Presentation
+
+from conftest import make_deck, slide_titles, titled_deck
+from presentationmanager import PresentationManager
+
+
+def shape_tags(slide):
+    """Local names of top-level shape elements, e.g. sp, grpSp or graphicFrame"""
+    return [shape._element.tag.rpartition("}")[2] for shape in slide.shapes]
+
+
+def test_populate_slides_after_template(tmp_path):
+    manager = PresentationManager(titled_deck(tmp_path / "deck.pptx", 3), template_slide_index=1)
+    manager.populate_slides([("one", "A"), ("two", "B")])
+
+    assert slide_titles(manager.presentation) == ["Slide 0", "Slide 1", "A", "B", "Slide 2"]
+    blob = manager.save(remove_template=True)
+    assert slide_titles(Presentation(BytesIO(blob))) == ["Slide 0", "A", "B", "Slide 2"]
+
+
+def test_populate_slides_keeps_order_of_many_items(tmp_path):
+    manager = PresentationManager(titled_deck(tmp_path / "deck.pptx", 2), template_slide_index=0)
+    manager.populate_slides((f"text {i}", f"T{i}") for i in range(50))
+    titles = slide_titles(manager.presentation)
+    assert titles == ["Slide 0"] + [f"T{i}" for i in range(50)] + ["Slide 1"]
+
+
+def test_populate_slides_splits_long_content(tmp_path):
+    manager = PresentationManager(titled_deck(tmp_path / "deck.pptx", 1), template_slide_index=0)
+    manager.MAX_CONTENT_LIMIT = 10
+    manager.populate_slides([("One. Two. Three.", "T")])
+    texts = [slide.placeholders[1].text for slide in list(manager.presentation.slides)[1:]]
+    assert texts == ["One. Two.", "Three."]
+
+
+def test_lazy_normalization_converts_slides_on_first_use(tmp_path):
+    deck = make_deck(tmp_path / "deck.pptx", ["text", "smartart", "ole_photo"])
+    manager = PresentationManager(deck, lazy_normalization=True)
+    assert not manager._normalized
+    assert shape_tags(manager.presentation.slides[1]).count("graphicFrame") == 1
+
+    manager.get_slide(1)
+    assert manager._normalized == {manager.presentation.slides[1].part}
+    assert "grpSp" in shape_tags(manager.presentation.slides[1])
+    assert "graphicFrame" in shape_tags(manager.presentation.slides[2])
+
+    # Slides not used yet are converted on save
+    saved = Presentation(BytesIO(manager.save()))
+    assert "graphicFrame" not in shape_tags(saved.slides[2])
+
+
+def test_eager_normalization(tmp_path):
+    deck = make_deck(tmp_path / "deck.pptx", ["smartart"])
+    manager = PresentationManager(deck)
+    assert len(manager._normalized) == 1
+    assert "grpSp" in shape_tags(manager.presentation.slides[0])
+
+
+def test_slide_counters_follow_slide_list(tmp_path):
+    manager = PresentationManager(titled_deck(tmp_path / "deck.pptx", 3), template_slide_index=0)
+    manager.populate_slides([("one", "A"), ("two", "B")])
+    manager.remove_slide(1)
+    manager.move_slide(0, 3)
+    manager.presentation.slides.add_slide(manager.presentation.slide_layouts[6])
+    manager.duplicate_slide(0)
+
+    assert manager._slide_count == len(manager.xml_slides) == 6
+    slide_ids = [sld_id.id for sld_id in manager.xml_slides]
+    assert len(set(slide_ids)) == 6
+    assert manager._next_slide_id > max(slide_ids)
+
+
+def test_fitting_text_needs_template_content_frame(tmp_path):
+    # Title Only layout
+    deck = titled_deck(tmp_path / "deck.pptx", 1, layout=5)
+    manager = PresentationManager(deck, template_slide_index=0, font_file="font.ttf")
+    with pytest.raises(ValueError, match="Template slide 0"):
+        manager.populate_slides([("text", "T")])
+
+
+def test_populate_slides_cancel(tmp_path):
+    manager = PresentationManager(titled_deck(tmp_path / "deck.pptx", 1), template_slide_index=0)
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(CancelledError):
+        manager.populate_slides([("text", "title")], cancel=cancel)
+    assert manager.total_slides == 1
@@ -0,0 +1,57 @@
+from io import BytesIO
+
+from pptx import Presentation
+
+from conftest import make_deck, slide_titles, titled_deck
+from presentationmanager import PresentationManager
+
+
+def test_compiled_template_matches_duplicates(tmp_path):
+    deck = titled_deck(tmp_path / "deck.pptx", 2)
+    items = [(f"text {i}", f"T{i}") for i in range(5)]
+    results = []
+    for compile_template in (False, True):
+        manager = PresentationManager(deck, template_slide_index=1, compile_template=compile_template)
+        manager.populate_slides(items)
+        results.append(Presentation(BytesIO(manager.save(remove_template=True))))
+
+    plain, compiled = results
+    assert slide_titles(compiled) == slide_titles(plain) == ["Slide 0"] + [f"T{i}" for i in range(5)]
+    assert [slide.placeholders[1].text for slide in compiled.slides] == [
+        slide.placeholders[1].text for slide in plain.slides
+    ]
+
+
+def test_stamped_slide_index_derived_from_prototype(tmp_path):
+    manager = PresentationManager(titled_deck(tmp_path / "deck.pptx", 1), template_slide_index=0)
+    slide = manager.stamp_slide(0)
+
+    shape_index = manager._shape_indexes[slide.part]
+    assert shape_index.is_current()
+    assert shape_index.title_shape()._element is slide.shapes.title._element
+    # Ids handed out by the index are free on the stamped slide
+    used = {shape.shape_id for shape in slide.shapes}
+    assert shape_index.allocate() > max(used)
+
+
+def test_stamped_charts_are_independent(tmp_path):
+    manager = PresentationManager(make_deck(tmp_path / "deck.pptx", ["chart"]))
+    first, second = manager.stamp_slide(0), manager.stamp_slide(0)
+    chart_parts = [
+        next(shape for shape in slide.shapes if shape.has_chart).chart_part
+        for slide in (first, second)
+    ]
+    assert chart_parts[0] is not chart_parts[1]
+    assert chart_parts[0]._element is not chart_parts[1]._element
+    assert chart_parts[0].blob == chart_parts[1].blob
+
+    chart_parts[0].chart.has_title = True
+    assert not chart_parts[1].chart.has_title
+    blob = manager.save()
+    assert len(Presentation(BytesIO(blob)).slides) == 3
+
+
+def test_stamped_slide_keeps_notes(tmp_path):
+    manager = PresentationManager(make_deck(tmp_path / "deck.pptx", ["text"]))
+    slide = manager.stamp_slide(0)
+    assert slide.notes_slide.notes_text_frame.text == "Notes for slide 0"
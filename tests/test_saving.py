@@ -0,0 +1,42 @@
+import zipfile
+from io import BytesIO
+
+from pptx import Presentation
+
+from conftest import partnames
+from utils import write_package
+
+
+def test_write_package_round_trip(mixed_deck):
+    presentation = Presentation(mixed_deck)
+    output = BytesIO()
+    write_package(presentation.part.package, output)
+
+    reopened = Presentation(BytesIO(output.getvalue()))
+    assert len(reopened.slides) == len(presentation.slides)
+    assert sorted(partnames(reopened)) == sorted(partnames(presentation))
+    for slide, copy in zip(presentation.slides, reopened.slides):
+        assert copy.part.blob == slide.part.blob
+
+
+def test_write_package_stores_compressed_media(mixed_deck):
+    presentation = Presentation(mixed_deck)
+    output = BytesIO()
+    write_package(presentation.part.package, output, compresslevel=9)
+
+    with zipfile.ZipFile(output) as zipf:
+        infos = {info.filename: info for info in zipf.infolist()}
+        assert len(infos) == len(set(zipf.namelist()))
+    media = [name for name in infos if name.endswith((".jpg", ".jpeg", ".png", ".xlsx"))]
+    assert media
+    assert all(infos[name].compress_type == zipfile.ZIP_STORED for name in media)
+    assert infos["ppt/presentation.xml"].compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_write_package_deflates_everything_unless_storing_compressed(mixed_deck):
+    presentation = Presentation(mixed_deck)
+    output = BytesIO()
+    write_package(presentation.part.package, output, store_compressed=False)
+
+    with zipfile.ZipFile(output) as zipf:
+        assert {info.compress_type for info in zipf.infolist()} == {zipfile.ZIP_DEFLATED}
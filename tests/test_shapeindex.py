@@ -0,0 +1,44 @@
+from pptx import Presentation
+from pptx.util import Inches
+
+from conftest import titled_deck
+from presentationmanager import PresentationManager
+from utils import ShapeIndex, remove_shape
+
+
+def test_shape_index_lookups_and_ids():
+    presentation = Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+    index = ShapeIndex(slide)
+    assert index.is_current()
+    assert index.title_shape().shape_id == slide.shapes.title.shape_id
+    assert index.content_shape().shape_id == slide.placeholders[1].shape_id
+
+    used = {shape.shape_id for shape in slide.shapes}
+    first, second = index.allocate(), index.allocate()
+    assert first > max(used) and second == first + 1
+
+
+def test_shape_index_copy_for_falls_back_when_stale():
+    presentation = Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+    index = ShapeIndex(slide)
+
+    slide.shapes.add_textbox(0, 0, Inches(1), Inches(1)).name = "Extra"
+    assert not index.is_current()
+    copy = index.copy_for(slide)
+    assert [shape.name for shape in copy.named("Extra")] == ["Extra"]
+
+
+def test_populate_with_stale_shape_index(tmp_path):
+    manager = PresentationManager(titled_deck(tmp_path / "deck.pptx", 1), template_slide_index=0)
+    template = manager.presentation.slides[0]
+    manager.shape_index(template)
+    # Change the template outside the index
+    remove_shape(template.placeholders[1])
+    template.shapes.add_textbox(Inches(1), Inches(2), Inches(4), Inches(2)).text = "box"
+
+    manager.populate_slide("hello", "title")
+    copy = manager.presentation.slides[1]
+    assert copy.shapes.title.text == "title"
+    assert [shape.text_frame.text for shape in copy.shapes][1] == "hello"
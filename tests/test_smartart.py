@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from lxml.etree import Element
+
+from common import DIAGRAM_CACHE, DrawingConversionCache
+from conftest import make_deck
+from presentationmanager import PresentationManager
+
+
+def test_drawing_conversion_cache_evicts_least_recently_used():
+    cache = DrawingConversionCache(maxsize=2)
+    for key in "abc":
+        cache.put(key, Element("group", name=key))
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    group = cache.get("b")
+    assert group.get("name") == "b"
+    # Copies are returned, so changes do not reach the cache
+    group.set("name", "changed")
+    cache.put("d", Element("group", name="d"))
+    assert cache.get("b").get("name") == "b"
+    assert cache.get("c") is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_repeated_smartart_converted_once(tmp_path):
+    deck = make_deck(tmp_path / "deck.pptx", ["smartart", "smartart"])
+    PresentationManager(deck)
+    assert (DIAGRAM_CACHE.misses, DIAGRAM_CACHE.hits) == (1, 1)
+
+
+def test_drawing_conversion_cache_shared_by_threads():
+    cache = DrawingConversionCache(maxsize=8)
+
+    def work(worker):
+        for i in range(500):
+            key = str((worker * 7 + i) % 20)
+            if cache.get(key) is None:
+                cache.put(key, Element("group"))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(work, range(8)))
+    assert len(cache) == 8
+    assert cache.hits + cache.misses == 8 * 500
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+from pptx import Presentation
+from pptx.util import Inches
+
+from utils import fill_table, remove_columns, remove_rows
+
+
+@pytest.fixture
+def slide():
+    presentation = Presentation()
+    return presentation.slides.add_slide(presentation.slide_layouts[6])
+
+
+def add_table(slide, rows, cols):
+    return slide.shapes.add_table(rows, cols, 0, 0, Inches(4), Inches(2)).table
+
+
+def table_text(table):
+    return [[cell.text for cell in row.cells] for row in table.rows]
+
+
+def test_fill_table_grows_and_shrinks(slide):
+    table = add_table(slide, 2, 2)
+    table.cell(0, 0).text = "header"
+
+    fill_table(table, pd.DataFrame({"a": [1, 2, 3], "b": [4, None, 6], "c": ["x", "y", "z"]}))
+    assert table_text(table) == [
+        ["a", "b", "c"], ["1", "4.0", "x"], ["2", "", "y"], ["3", "6.0", "z"]
+    ]
+    assert len(table.columns) == 3
+
+    fill_table(table, pd.DataFrame({"only": ["line 1\nline 2"]}), header=False)
+    assert table_text(table) == [["line 1\nline 2"]]
+
+
+def test_fill_table_without_grow_keeps_size(slide):
+    table = add_table(slide, 2, 2)
+    fill_table(table, pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6], "c": [7, 8, 9]}), grow=False)
+    assert table_text(table) == [["a", "b"], ["1", "4"]]
+
+
+@pytest.mark.parametrize(
+    "df, header",
+    [(pd.DataFrame(), True), (pd.DataFrame(index=[0, 1]), False), (pd.DataFrame({"a": []}), False)],
+)
+def test_fill_table_rejects_frames_leaving_no_cells(slide, df, header):
+    table = add_table(slide, 2, 2)
+    with pytest.raises(ValueError):
+        fill_table(table, df, header=header)
+    assert len(table.rows) == len(table.columns) == 2
+
+
+def test_fill_table_header_of_empty_frame(slide):
+    table = add_table(slide, 3, 1)
+    fill_table(table, pd.DataFrame({"a": [], "b": []}))
+    assert table_text(table) == [["a", "b"]]
+
+
+def test_remove_rows_and_columns(slide):
+    table = add_table(slide, 4, 4)
+    for r in range(4):
+        for c in range(4):
+            table.cell(r, c).text = f"{r}{c}"
+
+    remove_rows(table, [0, 2, 2])
+    remove_columns(table, [1, 3])
+    assert table_text(table) == [["10", "12"], ["30", "32"]]
+    assert len(table._tbl.tblGrid.gridCol_lst) == 2
+
+
+def test_remove_rows_and_columns_with_negative_indices(slide):
+    table = add_table(slide, 3, 3)
+    for r in range(3):
+        for c in range(3):
+            table.cell(r, c).text = f"{r}{c}"
+
+    remove_rows(table, [-1, 2])
+    remove_columns(table, [0, -3, -1])
+    assert table_text(table) == [["01"], ["11"]]
+
+    with pytest.raises(IndexError):
+        remove_rows(table, [2])
+    with pytest.raises(IndexError):
+        remove_columns(table, [-2])
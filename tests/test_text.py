@@ -0,0 +1,86 @@
+import pytest
+
+from common import iter_text_chunks, iter_text_pages
+from utils import FontMetrics
+
+
+class MonospaceFont(object):
+    """PIL-like font where every character is 1 wide, so widths are lengths"""
+
+    def getlength(self, text):
+        return len(text)
+
+    def getmetrics(self):
+        return 8, 2
+
+    def getbbox(self, text):
+        return 0, 0, len(text), 10
+
+
+@pytest.fixture
+def metrics():
+    return FontMetrics(MonospaceFont())
+
+
+def test_text_chunks_split_at_sentence_ends():
+    text = "One. Two. Three."
+    assert list(iter_text_chunks(text, max_chunk_size=9)) == ["One. Two.", "Three."]
+
+
+def test_text_chunks_split_at_newlines():
+    text = "first line\nsecond line"
+    assert list(iter_text_chunks(text, max_chunk_size=15)) == ["first line", "second line"]
+
+
+def test_text_chunks_hard_split_without_boundary():
+    assert list(iter_text_chunks("a" * 10, max_chunk_size=4)) == ["aaaa", "aaaa", "aa"]
+
+
+def test_text_chunks_short_text():
+    assert list(iter_text_chunks("short", max_chunk_size=100)) == ["short"]
+
+
+def test_line_starts_break_at_spaces(metrics):
+    assert metrics.line_starts("aaa bbb ccc", 7) == [0, 8]
+    assert metrics.wrap("aaa bbb ccc", 7) == ["aaa bbb", "ccc"]
+
+
+def test_line_starts_break_long_words_between_characters(metrics):
+    assert metrics.line_starts("abcdefghij", 4) == [0, 4, 8]
+    assert metrics.wrap("xx abcdefghij", 4) == ["xx", "abcd", "efgh", "ij"]
+
+
+def test_text_box_size(metrics):
+    width, height = metrics.text_box_size("aaa bbb ccc", max_width=7, line_spacing=4)
+    assert width == 7
+    assert height == metrics.lines_height(2, 4) == 10 + 4 + 10
+
+
+def test_text_pages_are_slices_of_the_text(metrics):
+    text = "first paragraph of text\nsecond  one\n\nthird after a blank line"
+    pages = list(iter_text_pages(text, metrics, width=10, height=20, line_height=10))
+    assert len(pages) > 1
+    for page in pages:
+        assert page in text
+    # Joining pages gives back the text, less the newlines at page ends
+    assert "".join(pages).replace("\n", "") == text.replace("\n", "")
+
+
+def test_text_pages_keep_broken_words_whole(metrics):
+    text = "x " + "abcdefghij" * 3
+    pages = list(iter_text_pages(text, metrics, width=8, height=10, line_height=10))
+    assert "".join(pages) == text
+    assert all(" " not in page.strip() for page in pages[1:])
+
+
+def test_text_pages_drop_newline_between_paragraphs(metrics):
+    pages = list(iter_text_pages("aaaa\nbbbb", metrics, width=10, height=10, line_height=10))
+    assert pages == ["aaaa", "bbbb"]
+
+
+def test_text_pages_space_before_paragraphs(metrics):
+    text = "aaaa\nbbbb\ncccc"
+    assert len(list(iter_text_pages(text, metrics, 10, 30, 10))) == 1
+    # Spacing before the second and third paragraphs pushes the third to a new page
+    pages = list(iter_text_pages(text, metrics, 10, 30, 10, space_before=3))
+    assert pages == ["aaaa\nbbbb", "cccc"]
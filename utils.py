@@ -1,6 +1,13 @@
 # Modified from: https://gist.github.com/Dasc3er/2af5069afb728c39d54434cb28a1dbb8
+import time
+import logging
+
 from pptx.enum.shapes import MSO_SHAPE_TYPE
 
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
 def _object_rels(obj):
     try:
         rels = obj.rels
@@ -15,6 +22,69 @@ def _object_rels(obj):
         return []
 
 
+class PartnameAllocator(object):
+    """
+    Hands out the next free partname for a template like "/ppt/slides/slide%d.xml" in constant 
+    time. Existing partnames of the package are indexed once, then each template keeps a 
+    counter above the highest number in use, so names are never reused.
+    Parts added by python-pptx through the package's `next_partname` share the counters. Slides 
+    added with `Slides.add_slide` do not: python-pptx renumbers slide partnames by position 
+    whenever `Presentation.slides` is read and names a new slide after the last one, so callers 
+    allocating slide partnames pass the slide count as `floor`.
+    """
+
+    def __init__(self, package):
+        import re
+
+        self._last_numbers = {}
+        for part in package.iter_parts():
+            match = re.match(r"^(.*?)(\d+)\.\w+$", part.partname)
+            if match:
+                prefix, number = match.group(1), int(match.group(2))
+                self._last_numbers[prefix] = max(self._last_numbers.get(prefix, 0), number)
+
+    def next_partname(self, tmpl, floor=0):
+        """Return |PackURI| next available partname matching `tmpl`, numbered above `floor`"""
+        from pptx.opc.packuri import PackURI
+
+        # Templates sharing a prefix share numbering, e.g. "/ppt/media/image%d.png" and ".jpeg"
+        prefix = tmpl[: tmpl.index("%d")]
+        number = max(self._last_numbers.get(prefix, 0), floor) + 1
+        self._last_numbers[prefix] = number
+        return PackURI(tmpl % number)
+
+
+def _package_of(obj):
+    """Returns the package of a part or presentation, following parts loaded with a part as their package"""
+    from pptx.package import Package
+
+    pack = obj
+    while not isinstance(pack, Package):
+        pack = getattr(pack, "part", pack).package
+    return pack
+
+
+def partname_allocator(obj):
+    """
+    Returns the |PartnameAllocator| of the package of `obj`, creating it on first use. The package's 
+    own `next_partname`, `next_image_partname` and `next_media_partname` are replaced so parts 
+    added by python-pptx take their names from the same allocator.
+    """
+    package = _package_of(obj)
+    allocator = getattr(package, "_partname_allocator", None)
+    if allocator is None:
+        allocator = PartnameAllocator(package)
+        package._partname_allocator = allocator
+        package.next_partname = allocator.next_partname
+        package.next_image_partname = lambda ext: allocator.next_partname(
+            "/ppt/media/image%d." + ext
+        )
+        package.next_media_partname = lambda ext: allocator.next_partname(
+            "/ppt/media/media%d." + ext
+        )
+    return allocator
+
+
 def _exp_add_slide(ppt, slide_layout):
     """
     Function to handle slide creation in the Presentation, to avoid issues caused by default implementation.
@@ -25,24 +95,9 @@ def _exp_add_slide(ppt, slide_layout):
 
     def generate_slide_partname(self):
         """Return |PackURI| instance containing next available slide partname."""
-        from pptx.opc.packuri import PackURI
-
-        sldIdLst = self._element.get_or_add_sldIdLst()
-
-        existing_rels = [k.target_partname for k in _object_rels(self)]
-        partname_str = "/ppt/slides/slide%d.xml" % (len(sldIdLst) + 1)
-
-        while partname_str in existing_rels:
-            import random
-            import string
-
-            random_part = "".join(random.choice(string.ascii_letters) for i in range(2))
-            partname_str = "/ppt/slides/slide%s%d.xml" % (
-                random_part,
-                len(sldIdLst) + 1,
-            )
-
-        return PackURI(partname_str)
+        return partname_allocator(self).next_partname(
+            "/ppt/slides/slide%d.xml", floor=len(self._element.get_or_add_sldIdLst())
+        )
 
     def add_slide_part(self, slide_layout):
         """
@@ -76,59 +131,71 @@ def copy_shapes(source, dest):
     :param dest:
     :return:
     """
+    # Copy all existing shapes, timing each by kind. Time of a group includes its contents
+    for shape in source:
+        start = time.perf_counter()
+        kind = _copy_shape(shape, dest)
+        METRICS.record("copy_shapes." + kind, time.perf_counter() - start)
+
+
+def _copy_shape(shape, dest):
+    """Copies shape to dest. Returns kind of shape copied"""
     from pptx.shapes.group import GroupShape
-    from pptx.shapes.graphfrm import GraphicFrame
     import copy
 
-    # Copy all existing shapes
-    for shape in source:
-        if isinstance(shape, GroupShape):
-            group = dest.shapes.add_group_shape()
-            group.name = shape.name
-            group.left = shape.left
-            group.top = shape.top
-            group.width = shape.width
-            group.height = shape.height
-            group.rotation = shape.rotation
-
-            # Recursive copy of contents
-            copy_shapes(shape.shapes, group)
-
-            # Fix offset
-            cur_el = group._element.xpath(".//p:grpSpPr")[0]
-            ref_el = shape._element.xpath(".//p:grpSpPr")[0]
-            parent = cur_el.getparent()
-            parent.insert(parent.index(cur_el) + 1, copy.deepcopy(ref_el))
-            parent.remove(cur_el)
-
-            result = group
-        elif hasattr(shape, "image"):
-            import io
-
-            # Get image contents
-            content = io.BytesIO(shape.image.blob)
-            result = dest.shapes.add_picture(
-                content, shape.left, shape.top, shape.width, shape.height
-            )
-            result.name = shape.name
-            result.crop_left = shape.crop_left
-            result.crop_right = shape.crop_right
-            result.crop_top = shape.crop_top
-            result.crop_bottom = shape.crop_bottom
-        elif hasattr(shape, "has_chart") and shape.has_chart:
-            result = clone_chart(shape, dest)
-        elif "Diagram" in shape.name:
-            # Ignore if shape contains SmartArt
-            continue
-        # elif shape.shape_type in [MSO_SHAPE_TYPE.LINKED_OLE_OBJECT, MSO_SHAPE_TYPE.EMBEDDED_OLE_OBJECT]:
-        elif shape.shape_type == MSO_SHAPE_TYPE.LINKED_OLE_OBJECT:
-            continue
-        else:
-            import copy
+    if isinstance(shape, GroupShape):
+        kind = "group"
+        group = dest.shapes.add_group_shape()
+        group.name = shape.name
+        group.left = shape.left
+        group.top = shape.top
+        group.width = shape.width
+        group.height = shape.height
+        group.rotation = shape.rotation
+
+        # Recursive copy of contents
+        copy_shapes(shape.shapes, group)
+
+        # Fix offset
+        cur_el = group._element.xpath(".//p:grpSpPr")[0]
+        ref_el = shape._element.xpath(".//p:grpSpPr")[0]
+        parent = cur_el.getparent()
+        parent.insert(parent.index(cur_el) + 1, copy.deepcopy(ref_el))
+        parent.remove(cur_el)
+
+        result = group
+    elif hasattr(shape, "image"):
+        kind = "picture"
+        import io
+
+        # Get image contents
+        content = io.BytesIO(shape.image.blob)
+        result = dest.shapes.add_picture(
+            content, shape.left, shape.top, shape.width, shape.height
+        )
+        result.name = shape.name
+        result.crop_left = shape.crop_left
+        result.crop_right = shape.crop_right
+        result.crop_top = shape.crop_top
+        result.crop_bottom = shape.crop_bottom
+    elif hasattr(shape, "has_chart") and shape.has_chart:
+        kind = "chart"
+        result = clone_chart(shape, dest)
+    elif "Diagram" in shape.name:
+        # Ignore if shape contains SmartArt
+        return "skipped_smartart"
+    # elif shape.shape_type in [MSO_SHAPE_TYPE.LINKED_OLE_OBJECT, MSO_SHAPE_TYPE.EMBEDDED_OLE_OBJECT]:
+    elif shape.shape_type == MSO_SHAPE_TYPE.LINKED_OLE_OBJECT:
+        return "skipped_linked_ole"
+    else:
+        kind = "element"
+        import copy
+
+        newel = copy.deepcopy(shape.element)
+        dest.shapes._spTree.insert_element_before(newel, "p:extLst")
+        result = dest.shapes[-1]
 
-            newel = copy.deepcopy(shape.element)
-            dest.shapes._spTree.insert_element_before(newel, "p:extLst")
-            result = dest.shapes[-1]
+    return kind
 
 
 def duplicate_slide(ppt, slide_index: int, dest_ppt=None):
@@ -225,6 +292,124 @@ def chart_to_dataframe(graphical_frame) -> pd.DataFrame:
     return df
 
 
+from lxml import etree
+
+_C_NS = {"c": "http://schemas.openxmlformats.org/drawingml/2006/chart"}
+# XPath expressions compiled once, as these run for every series of every chart read
+_xpath_series = etree.XPath(".//c:plotArea/*/c:ser", namespaces=_C_NS)
+_xpath_series_name = etree.XPath("string(./c:tx//c:v)", namespaces=_C_NS)
+_xpath_cache = etree.XPath(
+    "./*/c:numCache | ./*/c:strCache | ./c:numLit | ./c:strLit"
+    " | ./c:multiLvlStrRef/c:multiLvlStrCache/c:lvl[1]",
+    namespaces=_C_NS,
+)
+_xpath_is_numeric = etree.XPath("boolean(./*/c:numCache | ./c:numLit)", namespaces=_C_NS)
+_xpath_pt_count = etree.XPath("./c:ptCount/@val | ../c:ptCount/@val", namespaces=_C_NS)
+_xpath_pts = etree.XPath("./c:pt", namespaces=_C_NS)
+_xpath_pt_value = etree.XPath("string(./c:v)", namespaces=_C_NS)
+
+
+def _cached_points(ref_parent, numeric):
+    """
+    Returns values cached under a series element such as c:cat, c:val, c:xVal, c:yVal or 
+    c:bubbleSize as a list with None for missing points, or None if there is no cache.
+    """
+    if ref_parent is None:
+        return None
+    caches = _xpath_cache(ref_parent)
+    if not caches:
+        return None
+    cache = caches[0]
+    pt_count = _xpath_pt_count(cache)
+    pts = [(int(pt.get("idx")), _xpath_pt_value(pt)) for pt in _xpath_pts(cache)]
+    size = int(pt_count[0]) if pt_count else max([idx + 1 for idx, _ in pts] + [0])
+
+    values = [None] * size
+    for idx, v in pts:
+        if idx < size:
+            values[idx] = float(v) if numeric else v
+    return values
+
+
+def chart_series_from_cache(graphical_frame):
+    """
+    Helper to read chart data from the caches in the chart XML, without opening the embedded 
+    workbook. Works for category, XY and bubble charts.
+
+    Returns list of (name, categories, values, sizes) for each series, where categories are 
+    the X values for XY and bubble charts and sizes is None for other charts. Values and sizes 
+    are float numpy arrays with NaN for missing points. Returns None if any cache is missing.
+
+    :param graphical_frame:
+    :return:
+    """
+    import numpy as np
+
+    series = []
+    for ser in _xpath_series(graphical_frame.chart.part._element):
+        children = {etree.QName(el).localname: el for el in ser}
+
+        name = _xpath_series_name(ser)
+        x_ref = children.get("cat", children.get("xVal"))
+        y_ref = children.get("val", children.get("yVal"))
+        x_numeric = x_ref is not None and _xpath_is_numeric(x_ref)
+
+        categories = _cached_points(x_ref, numeric=x_numeric)
+        values = _cached_points(y_ref, numeric=True)
+        if categories is None or values is None:
+            return None
+
+        sizes = None
+        if "bubbleSize" in children:
+            sizes = _cached_points(children["bubbleSize"], numeric=True)
+            if sizes is None:
+                return None
+            sizes = np.array(sizes, dtype=float)
+
+        series.append(
+            (name, np.array(categories), np.array(values, dtype=float), sizes)
+        )
+
+    return series
+
+
+def chart_cache_to_dataframe(graphical_frame) -> pd.DataFrame:
+    """
+    Helper to parse chart data to a DataFrame from the caches in the chart XML. Falls back to 
+    reading the embedded workbook with `chart_to_dataframe` if the caches are missing or a series 
+    has not as many values as categories.
+
+    If all series share the same categories (X values for XY and bubble charts), these are the 
+    index, with each series becoming a column, as expected by `update`. Otherwise, e.g. for XY 
+    series with different X values, the DataFrame is in long format with a row for each point and 
+    columns "series", "category" and "value". Bubble sizes are only returned by 
+    `chart_series_from_cache`.
+
+    :param graphical_frame:
+    :return:
+    """
+    import numpy as np
+
+    series = chart_series_from_cache(graphical_frame)
+    if not series:
+        return chart_to_dataframe(graphical_frame)
+
+    if any(len(s[2]) != len(s[1]) for s in series):
+        return chart_to_dataframe(graphical_frame)
+
+    categories = series[0][1]
+    if all(np.array_equal(s[1], categories) for s in series[1:]):
+        df = pd.DataFrame({i: s[2] for i, s in enumerate(series)}, index=categories)
+        df.columns = [s[0] for s in series]
+        return df
+
+    return pd.DataFrame({
+        "series": np.repeat([s[0] for s in series], [len(s[1]) for s in series]),
+        "category": np.concatenate([np.asarray(s[1], dtype=object) for s in series]),
+        "value": np.concatenate([s[2] for s in series]),
+    })
+
+
 def dataframe_to_chart_data(df):
     """
     Transforms a DataFrame to a CategoryChartData for PPT compilation.
@@ -260,7 +445,10 @@ def dataframe_to_chart_data(df):
 
 def update(shape, data):
     shape.chart.replace_data(dataframe_to_chart_data(data))
+    _fix_point_series(shape)
+
 
+def _fix_point_series(shape):
     # Fix for filling non category charts (XY, Bubble)
     id_attribute = (
         "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
@@ -297,10 +485,194 @@ def update(shape, data):
         series_ref.remove(y)
 
 
+def _numeric_frame(df):
+    """
+    Returns the DataFrame with columns of other dtypes, e.g. numeric strings or None, converted 
+    to numbers. Values that are not numbers become NaN, so they are filled to empty as well
+    """
+    import pandas as pd
+    from pandas.api.types import is_numeric_dtype
+
+    if all(is_numeric_dtype(dtype) for dtype in df.dtypes):
+        return df
+    return df.apply(pd.to_numeric, errors="coerce")
+
+
+def dataframes_to_chart_data(frames):
+    """
+    Transforms DataFrames to CategoryChartData objects as `dataframe_to_chart_data` does, 
+    replacing NaN/INF values of all frames in a single vectorized pass.
+
+    :param frames: list of DataFrames
+    :return: list of CategoryChartData
+    """
+    from pptx.chart.data import CategoryChartData
+    import numpy as np
+
+    arrays = [_numeric_frame(df).to_numpy(dtype=float, na_value=np.nan) for df in frames]
+    if not arrays:
+        return []
+
+    # Sanitize values of all frames at once
+    flat = np.concatenate([a.ravel() for a in arrays])
+    finite = np.isfinite(flat)
+    values = flat.astype(object)
+    values[~finite] = None
+    edge_cases = np.count_nonzero(~finite)
+
+    all_chart_data = []
+    offset = 0
+    for df, array in zip(frames, arrays):
+        frame_values = values[offset : offset + array.size].reshape(array.shape)
+        offset += array.size
+
+        chart_data = CategoryChartData()
+        chart_data.categories = df.index.astype(str).to_list()
+        for c, series_values in zip(df.columns, frame_values.T.tolist()):
+            chart_data.add_series(str(c), series_values)
+        all_chart_data.append(chart_data)
+
+    # Warning over data filled for compatibility
+    if edge_cases > 0:
+        import warnings
+
+        warnings.warn(
+            f"Series data containing NaN/INF values: {edge_cases} values filled to empty"
+        )
+
+    return all_chart_data
+
+
+def _xlsx_blob(chart_data):
+    return chart_data.xlsx_blob
+
+
+def find_charts(presentation, keys=None):
+    """
+    Returns dict of {(slide index, shape name): shape} for charts in the presentation, 
+    optionally only for the given keys.
+    Raises ValueError if a slide has several charts with one of these names, as only one of 
+    them could be addressed.
+    """
+    keys = None if keys is None else set(keys)
+    slide_indices = None if keys is None else {index for index, _ in keys}
+    charts = {}
+    duplicates = set()
+    for index, slide in enumerate(presentation.slides):
+        if slide_indices is not None and index not in slide_indices:
+            continue
+        for shape in slide.shapes:
+            if getattr(shape, "has_chart", False):
+                key = (index, shape.name)
+                if key in charts:
+                    duplicates.add(key)
+                charts[key] = shape
+    if keys is not None:
+        duplicates &= keys
+    if duplicates:
+        raise ValueError(f"Several charts share the same name on a slide: {sorted(duplicates)}")
+    return charts
+
+
+def update_charts(presentation, data, executor=None, max_workers=None):
+    """
+    Replaces data of many charts at once. Equivalent to calling `update` for each chart,
+    with NaN/INF values of all frames cleaned in one pass.
+
+    :param presentation:
+    :param data: dict of {(slide index, shape name): DataFrame}
+    :param executor: None to write embedded workbooks in this thread, "thread" or "process" to 
+        write them in a pool of `max_workers`
+    :return:
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    from pptx.chart.xmlwriter import SeriesXmlRewriterFactory
+
+    charts = find_charts(presentation, data.keys())
+    missing = [key for key in data if key not in charts]
+    if missing:
+        raise KeyError(f"Charts not found: {missing}")
+
+    keys = list(data)
+    all_chart_data = dataframes_to_chart_data([data[key] for key in keys])
+
+    # Serializing workbooks with XlsxWriter is the costly part of replacing chart data
+    if executor is None:
+        blobs = [_xlsx_blob(chart_data) for chart_data in all_chart_data]
+    else:
+        pool_class = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}[executor]
+        with pool_class(max_workers=max_workers) as pool:
+            blobs = list(pool.map(_xlsx_blob, all_chart_data))
+
+    for key, chart_data, blob in zip(keys, all_chart_data, blobs):
+        shape = charts[key]
+        chart = shape.chart
+        rewriter = SeriesXmlRewriterFactory(chart.chart_type, chart_data)
+        rewriter.replace_series_data(chart._chartSpace)
+        chart._workbook.update_from_xlsx_blob(blob)
+        _fix_point_series(shape)
+
+
 def clone_chart(graphical_frame, dest):
     """
     Helper to clone a chart with related styling.
 
+    Copies the chart part, embedded workbook, style and colors parts as they are, falling back to
+    rebuilding the chart from its data for charts that cannot be copied directly. Style and colors
+    parts identical to ones already in the destination package are reused.
+
+    :param graphical_frame: General shape containing the .chart property
+    :param dest: Shapes object on which to add the new chart
+    :return:
+    """
+    with METRICS.timer("clone_chart"):
+        try:
+            chart = _copy_chart_parts(graphical_frame, dest)
+            METRICS.count("clone_chart.copied")
+            return chart
+        except Exception:
+            import warnings
+
+            warnings.warn(f"Could not copy {graphical_frame.name} directly: rebuilding chart from data")
+            METRICS.count("clone_chart.rebuilt")
+            return _rebuild_chart(graphical_frame, dest)
+
+
+def _copy_chart_parts(graphical_frame, dest):
+    """
+    Clones chart by copying the graphic frame XML and the bytes of the chart part and its related 
+    parts, only remapping the rId of the chart relationship.
+
+    :param graphical_frame: General shape containing the .chart property
+    :param dest: Shapes object on which to add the new chart
+    :return:
+    """
+    import copy
+
+    id_attribute = (
+        "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+    )
+
+    old_chart_ref_id = graphical_frame.element.xpath(".//c:chart")[0].attrib[
+        id_attribute
+    ]
+    old_chart_part = graphical_frame.part.related_part(old_chart_ref_id)
+
+    # Copy chart part with its workbook, styling and colors, keeping their rIds
+    new_chart_part = _PartSnapshot(old_chart_part).load(dest.part.package)
+    chart_ref_id = dest.part.relate_to(new_chart_part, RT.CHART)
+
+    newel = copy.deepcopy(graphical_frame.element)
+    newel.xpath(".//c:chart")[0].set(id_attribute, chart_ref_id)
+    dest.shapes._spTree.insert_element_before(newel, "p:extLst")
+
+    return dest.shapes[-1]
+
+
+def _rebuild_chart(graphical_frame, dest):
+    """
+    Helper to clone a chart by adding a new chart with the same data and copying styling.
+
     :param graphical_frame: General shape containing the .chart property
     :param dest: Shapes object on which to add the new chart
     :return:
@@ -388,8 +760,10 @@ def clone_chart(graphical_frame, dest):
 
     new_chart_refs = new_chart_part.rels
     old_chart_refs = old_chart_part.rels
+    package = _package_of(dest)
+    interner = part_interner(package)
 
-    # Fix styling and colors applied to the new chart
+    # Fix styling and colors applied to the new chart, reusing identical parts of the package
     for k, v in dict(old_chart_refs._rels).items():
         if (
             v.reltype
@@ -397,9 +771,14 @@ def clone_chart(graphical_frame, dest):
         ):
             targ = v.target_part
 
-            new_el = parse_xml(copy.deepcopy(targ.blob))
-            new_el.set("id", str(randrange(10**5, 10**9)))
-            new_colors_ref = StylePart.new(targ.package, etree.tostring(new_el))
+            key = interner.key(CT.OFC_CHART_STYLE, targ.blob)
+            new_colors_ref = interner.get(key)
+            if new_colors_ref is None:
+                new_el = parse_xml(copy.deepcopy(targ.blob))
+                new_el.set("id", str(randrange(10**5, 10**9)))
+                new_colors_ref = interner.add(
+                    StylePart.new(package, etree.tostring(new_el)), key
+                )
             new_chart_refs.get_or_add(
                 "http://schemas.microsoft.com/office/2011/relationships/chartStyle",
                 new_colors_ref,
@@ -407,9 +786,14 @@ def clone_chart(graphical_frame, dest):
         elif v.reltype == RT.CHART_COLOR_STYLE:
             targ = v.target_part
 
-            new_el = parse_xml(copy.deepcopy(targ.blob))
-            new_el.set("id", str(randrange(10**5, 10**9)))
-            new_colors_ref = ColorsPart.new(targ.package, etree.tostring(new_el))
+            key = interner.key(CT.OFC_CHART_COLORS, targ.blob)
+            new_colors_ref = interner.get(key)
+            if new_colors_ref is None:
+                new_el = parse_xml(copy.deepcopy(targ.blob))
+                new_el.set("id", str(randrange(10**5, 10**9)))
+                new_colors_ref = interner.add(
+                    ColorsPart.new(package, etree.tostring(new_el)), key
+                )
             new_chart_refs.get_or_add(RT.CHART_COLOR_STYLE, new_colors_ref)
 
     return new_chart
@@ -512,14 +896,188 @@ def remove_row(table, row_index: int) -> None:
     table._tbl.remove(row._tr)
 
 
+def _normalize_indices(indices, length):
+    """Returns indices as sorted positions in range(length), negative indices counting from the end"""
+    positions = set()
+    for i in indices:
+        if not -length <= i < length:
+            raise IndexError(f"Index {i} out of range for {length} items")
+        positions.add(i % length)
+    return sorted(positions)
+
+
+def remove_rows(table, row_indices) -> None:
+    """
+    Removes rows at given indices from the table in one pass. Indices naming the same row, 
+    e.g. -1 and the last index, remove it once.
+
+    :param table: shape.table element
+    :param row_indices: iterable of row indices
+    :return:
+    """
+    tbl = table._tbl
+    tr_lst = tbl.tr_lst
+    for i in _normalize_indices(row_indices, len(tr_lst)):
+        tbl.remove(tr_lst[i])
+
+
+def remove_columns(table, column_indices) -> None:
+    """
+    Removes columns at given indices from the table in one pass. Indices naming the same column, 
+    e.g. -1 and the last index, remove it once.
+
+    :param table: shape.table element
+    :param column_indices: iterable of column indices
+    :return:
+    """
+    tbl = table._tbl
+    grid_cols = tbl.tblGrid.gridCol_lst
+    indices = _normalize_indices(column_indices, len(grid_cols))
+    for tr in tbl.tr_lst:
+        tc_lst = tr.tc_lst
+        for i in indices:
+            tr.remove(tc_lst[i])
+    for i in indices:
+        tbl.tblGrid.remove(grid_cols[i])
+
+
+# Row and column ids (a16:rowId, a16:colId) in extensions of table rows and grid columns
+_EXT_IDS = etree.XPath(
+    "./a:extLst/a:ext/*[@val]", namespaces={"a": "http://schemas.openxmlformats.org/drawingml/2006/main"}
+)
+
+
+def _max_ext_id(elements):
+    return max((int(id_el.get("val")) for element in elements for id_el in _EXT_IDS(element)), default=0)
+
+
+def _set_ext_id(element, value):
+    # Row and column ids must be unique, or the table cannot be edited in PowerPoint
+    for id_el in _EXT_IDS(element):
+        id_el.set("val", str(value))
+
+
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+
+
+def _set_cell_text(tc, text):
+    """
+    Replaces text of cell with `text`, one paragraph per line, keeping the paragraph properties 
+    and the run properties of the first run
+    """
+    import copy
+
+    txBody = tc.find(_A + "txBody")
+    if txBody is None:
+        txBody = tc.get_or_add_txBody()
+    paragraphs = txBody.findall(_A + "p")
+    p = paragraphs[0]
+    for extra in paragraphs[1:]:
+        txBody.remove(extra)
+    pPr = p.find(_A + "pPr")
+    rPr = p.find(_A + "r/" + _A + "rPr")
+    endParaRPr = p.find(_A + "endParaRPr")
+    for child in list(p):
+        if child is not pPr and child is not endParaRPr:
+            p.remove(child)
+    if endParaRPr is None and rPr is not None:
+        # Keeps formatting of the run for empty cells
+        endParaRPr = copy.deepcopy(rPr)
+        endParaRPr.tag = _A + "endParaRPr"
+        p.append(endParaRPr)
+
+    for i, line in enumerate(text.split("\n")):
+        if i:
+            p = etree.SubElement(txBody, _A + "p")
+            if pPr is not None:
+                p.append(copy.deepcopy(pPr))
+        if line:
+            r = etree.Element(_A + "r")
+            if rPr is not None:
+                r.append(copy.deepcopy(rPr))
+            etree.SubElement(r, _A + "t").text = line
+            if i == 0 and endParaRPr is not None:
+                endParaRPr.addprevious(r)
+            else:
+                p.append(r)
+
+
+def _cell_text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return str(value)
+
+
+def fill_table(table, df: pd.DataFrame, header: bool = True, grow: bool = True) -> None:
+    """
+    Writes a DataFrame to the table in one pass, with the column names in the first row if 
+    `header` is set.
+    If `grow` is set, the table is resized to fit the DataFrame: rows and columns added are 
+    copies of the last row and column, and rows and columns beyond the DataFrame are removed, 
+    raising ValueError for a DataFrame that would leave the table without any row or column. 
+    Otherwise values that do not fit the table are left out.
+    Cells keep the paragraph and run formatting of the cells they are written to or cloned from.
+
+    :param table: shape.table element
+    :param df: DataFrame
+    :param header: write column names in the first row
+    :param grow: resize the table to the DataFrame
+    :return:
+    """
+    import copy
+
+    tbl = table._tbl
+    rows = [list(df.columns)] if header else []
+    rows.extend(df.itertuples(index=False, name=None))
+    n_rows, n_cols = len(rows), len(df.columns)
+    if grow and not (n_rows and n_cols):
+        raise ValueError(f"Cannot fit table to a DataFrame of {n_rows} rows and {n_cols} columns")
+
+    if grow:
+        # Columns
+        grid_cols = tbl.tblGrid.gridCol_lst
+        if n_cols < len(grid_cols):
+            remove_columns(table, range(n_cols, len(grid_cols)))
+        elif n_cols > len(grid_cols):
+            next_id = _max_ext_id(grid_cols) + 1
+            for _ in range(n_cols - len(grid_cols)):
+                new_col = copy.deepcopy(grid_cols[-1])
+                _set_ext_id(new_col, next_id)
+                next_id += 1
+                tbl.tblGrid.append(new_col)
+            for tr in tbl.tr_lst:
+                last_tc = tr.tc_lst[-1]
+                for _ in range(n_cols - len(grid_cols)):
+                    new_tc = copy.deepcopy(last_tc)
+                    last_tc.addnext(new_tc)
+                    last_tc = new_tc
+
+        # Rows
+        tr_lst = tbl.tr_lst
+        if n_rows < len(tr_lst):
+            remove_rows(table, range(n_rows, len(tr_lst)))
+        elif n_rows > len(tr_lst):
+            # Cells of new rows are all written below, so the text of the row copied can stay
+            next_id = _max_ext_id(tr_lst) + 1
+            last_tr = template_tr = tr_lst[-1]
+            for _ in range(n_rows - len(tr_lst)):
+                new_tr = copy.deepcopy(template_tr)
+                _set_ext_id(new_tr, next_id)
+                next_id += 1
+                last_tr.addnext(new_tr)
+                last_tr = new_tr
+
+    for tr, values in zip(tbl.tr_lst, rows):
+        for tc, value in zip(tr.tc_lst, values):
+            _set_cell_text(tc, _cell_text(value))
+
+
 ### SLIDE MASTER & LAYOUT
 from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
 from pptx.opc.package import XmlPart
-from pptx.opc.packuri import PackURI
 from pptx.parts.slide import SlideLayoutPart as SLP, SlideMasterPart as SMP
 
 from random import randrange
-from lxml import etree
 from pptx.oxml import parse_xml
 import copy
 
@@ -529,25 +1087,11 @@ class SlideLayoutPart(SLP):
 
     @classmethod
     def new(cls, slide_masters, slide_master, element):
-        existing = [
-            i.target_partname
-            for s in slide_masters
-            for i in _object_rels(s.part)
-            if "slideLayouts" in i.target_partname
-        ]
-        partname_str = cls.partname_template % (len(existing) + 1)
-
-        while partname_str in existing:
-            import random
-            import string
-
-            random_part = "".join(random.choice(string.ascii_letters) for i in range(2))
-            partname_str = cls.partname_template % (random_part, len(existing) + 1)
-
+        package = _package_of(slide_master)
         part = cls.load(
-            PackURI(partname_str),
+            partname_allocator(package).next_partname(cls.partname_template),
             CT.PML_SLIDE_LAYOUT,
-            slide_master,
+            package,
             element,
         )
         return part
@@ -558,24 +1102,11 @@ class SlideMasterPart(SMP):
 
     @classmethod
     def new(cls, ppt, element):
-        existing = [
-            i.target_partname
-            for i in _object_rels(ppt.part)
-            if "slideMasters" in i.target_partname
-        ]
-        partname_str = cls.partname_template % (len(existing) + 1)
-
-        while partname_str in existing:
-            import random
-            import string
-
-            random_part = "".join(random.choice(string.ascii_letters) for i in range(2))
-            partname_str = cls.partname_template % (random_part, len(existing) + 1)
-
+        package = _package_of(ppt)
         part = cls.load(
-            PackURI(partname_str),
+            partname_allocator(package).next_partname(cls.partname_template),
             CT.PML_SLIDE_MASTER,
-            ppt,
+            package,
             element,
         )
         return part
@@ -586,24 +1117,11 @@ class ThemePart(XmlPart):
 
     @classmethod
     def new(cls, ppt, element):
-        existing = [
-            i.target_partname
-            for i in _object_rels(ppt.part)
-            if "theme" in i.target_partname
-        ]
-        partname_str = cls.partname_template % (len(existing) + 1)
-
-        while partname_str in existing:
-            import random
-            import string
-
-            random_part = "".join(random.choice(string.ascii_letters) for i in range(2))
-            partname_str = cls.partname_template % (random_part, len(existing) + 1)
-
+        package = _package_of(ppt)
         part = cls.load(
-            PackURI(partname_str),
+            partname_allocator(package).next_partname(cls.partname_template),
             CT.OFC_THEME,
-            ppt,
+            package,
             element,
         )
         return part
@@ -678,14 +1196,18 @@ def clone_slide_master(pres, slide_master):
             else:
                 master_slide_ref.part.rels.get_or_add(rel.reltype, rel._target)
 
-        # Themes need to be copied completely
+        # Themes need to be copied completely, unless an identical theme is there already
         if rel.reltype == RT.THEME:
             targ = rel.target_part
 
-            new_el = parse_xml(copy.deepcopy(targ.blob))
-            new_el.set("id", str(randrange(10**5, 10**9)))
+            interner = part_interner(pres)
+            key = interner.key(CT.OFC_THEME, targ.blob)
+            new_ref = interner.get(key)
+            if new_ref is None:
+                new_el = parse_xml(copy.deepcopy(targ.blob))
+                new_el.set("id", str(randrange(10**5, 10**9)))
 
-            new_ref = ThemePart.new(pres, etree.tostring(new_el))
+                new_ref = interner.add(ThemePart.new(pres, etree.tostring(new_el)), key)
             master_slide_ref.part.rels.get_or_add(RT.THEME, new_ref)
             pres.part.rels.get_or_add(RT.THEME, new_ref)
 
@@ -784,6 +1306,1161 @@ def _fix_package_ref(dest):
     return dest
 
 
+### PACKAGE COMPACTION
+
+# Relationships a slide only needs while its XML refers to their rId
+EXPLICIT_SLIDE_RELTYPES = (
+    RT.IMAGE,
+    RT.CHART,
+    RT.OLE_OBJECT,
+    RT.PACKAGE,
+    RT.HYPERLINK,
+    RT.MEDIA,
+    RT.VIDEO,
+    RT.AUDIO,
+    RT.DIAGRAM_DATA,
+    RT.DIAGRAM_LAYOUT,
+    RT.DIAGRAM_QUICK_STYLE,
+    RT.DIAGRAM_COLORS,
+)
+DIAGRAM_DRAWING_RELTYPE = "http://schemas.microsoft.com/office/2007/relationships/diagramDrawing"
+
+
+def _referenced_rIds(element):
+    """Returns set of values of all attributes in the relationships namespace, e.g. r:id, r:embed"""
+    r_ns = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+    return {
+        value
+        for el in element.iter()
+        for key, value in el.attrib.items()
+        if key.startswith(r_ns)
+    }
+
+
+def _remove_rel_references(element, rId):
+    """Removes elements referring to relationship `rId`, e.g. links to slides that are not kept"""
+    r_ns = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+    for el in element.xpath(".//*[@*[namespace-uri()='%s' and .='%s']]" % (r_ns, rId)):
+        if el.getparent() is not None:
+            el.getparent().remove(el)
+
+
+def _unreferenced_rels(slide_part):
+    """
+    Returns relationships of a slide, layout or master that are only needed while its XML refers 
+    to them, and that it no longer refers to, e.g. diagram parts of SmartArt converted to shapes
+    """
+    referenced = _referenced_rIds(slide_part._element)
+    rels = _object_rels(slide_part)
+    unreferenced = [
+        rel for rel in rels if rel.reltype in EXPLICIT_SLIDE_RELTYPES and rel.rId not in referenced
+    ]
+    # Diagram drawings are referenced from the diagram data part, not the slide
+    if not any(r.reltype == RT.DIAGRAM_DATA and r.rId in referenced for r in rels):
+        unreferenced.extend(rel for rel in rels if rel.reltype == DIAGRAM_DRAWING_RELTYPE)
+    return unreferenced
+
+
+def _drop_unreferenced_slide_rels(slide_part):
+    for rel in _unreferenced_rels(slide_part):
+        slide_part.rels.pop(rel.rId)
+
+
+def remove_unused_parts(presentation):
+    """
+    Drops parts that are no longer used by the presentation: slides removed from the slide list 
+    and, for the remaining slides, related parts their XML no longer refers to (e.g. shapes 
+    removed with `remove_shape`, or SmartArt converted to shapes). Everything only reachable 
+    through those is then left out when saving.
+
+    :param presentation:
+    :return: (number of parts removed, bytes reclaimed)
+    """
+    package = presentation.part.package
+    parts_before = set(package.iter_parts())
+
+    # Mark: slides in the slide list are live
+    live_rIds = {sldId.rId for sldId in presentation.slides._sldIdLst}
+    for rel in _object_rels(presentation.part):
+        if rel.reltype == RT.SLIDE and rel.rId not in live_rIds:
+            presentation.part.rels.pop(rel.rId)
+
+    for slide in presentation.slides:
+        _drop_unreferenced_slide_rels(slide.part)
+
+    # Sweep: parts no longer reachable from the package are not saved
+    removed = parts_before - set(package.iter_parts())
+    return len(removed), sum(len(part.blob) for part in removed)
+
+
+### SAVING
+import zipfile
+
+# Parts in formats that are already compressed, which deflate cannot shrink
+COMPRESSED_EXTENSIONS = {
+    "jpeg", "jpg", "png", "gif", "tif", "tiff",
+    "mp4", "m4v", "mov", "avi", "wmv", "mpg", "mpeg",
+    "mp3", "m4a", "wma", "wav",
+    "xlsx", "docx", "pptx",
+}
+
+
+def write_package(package, pkg_file, compresslevel=None, store_compressed=True):
+    """
+    Writes package to `pkg_file` like `Presentation.save`, with control over compression:
+    XML and other parts are deflated at `compresslevel` (0-9, None for the zlib default) and, 
+    if `store_compressed` is set, parts already compressed such as JPEG, PNG and MP4 media or 
+    embedded workbooks are stored as they are.
+
+    :param package: OpcPackage, e.g. `presentation.part.package`
+    :param pkg_file: path or writable file object
+    :return:
+    """
+    from pptx.opc.oxml import serialize_part_xml
+    from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+    from pptx.opc.serialized import _ContentTypesItem
+
+    parts = tuple(package.iter_parts())
+    with zipfile.ZipFile(
+        pkg_file, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel
+    ) as zipf:
+        zipf.writestr(
+            CONTENT_TYPES_URI.membername,
+            serialize_part_xml(_ContentTypesItem.xml_for(parts)),
+        )
+        zipf.writestr(PACKAGE_URI.rels_uri.membername, package._rels.xml)
+        for part in parts:
+            compress_type = zipfile.ZIP_DEFLATED
+            if store_compressed and part.partname.ext.lower() in COMPRESSED_EXTENSIONS:
+                compress_type = zipfile.ZIP_STORED
+            zipf.writestr(part.partname.membername, part.blob, compress_type=compress_type)
+            if part._rels:
+                zipf.writestr(part.partname.rels_uri.membername, part.rels.xml)
+
+
+### PARTIAL LOADING
+from pptx.opc.constants import RELATIONSHIP_TARGET_MODE as RTM
+from pptx.opc.package import _PackageLoader
+from pptx.opc.packuri import PACKAGE_URI, PackURI
+from pptx.opc.serialized import PackageReader
+from pptx.util import lazyproperty
+
+
+class _ZipMemberReader(object):
+    """Reads members of a zip package on request, unlike python-pptx which reads all of them"""
+
+    def __init__(self, pkg_file):
+        self._zipf = zipfile.ZipFile(pkg_file, "r")
+        self._names = {PackURI("/" + name) for name in self._zipf.namelist()}
+
+    def __contains__(self, pack_uri):
+        return pack_uri in self._names
+
+    def __getitem__(self, pack_uri):
+        if pack_uri not in self._names:
+            raise KeyError("no member '%s' in package" % pack_uri)
+        return self._zipf.read(pack_uri.membername)
+
+    def close(self):
+        self._zipf.close()
+
+
+class _PartialPackageReader(PackageReader):
+    @lazyproperty
+    def _blob_reader(self):
+        return _ZipMemberReader(self._pkg_file)
+
+
+class _PartialPackageLoader(_PackageLoader):
+    """
+    Loads only the parts reachable from the package without passing through slides other than 
+    `slide_indices`: the presentation, its masters, layouts and themes, and the requested slides 
+    with their notes, media, charts and embeddings
+    """
+
+    def __init__(self, pkg_file, package, slide_indices):
+        super().__init__(pkg_file, package)
+        self._slide_indices = set(slide_indices)
+
+    @lazyproperty
+    def _package_reader(self):
+        return _PartialPackageReader(self._pkg_file)
+
+    @lazyproperty
+    def _skipped_slides(self):
+        """Partnames of slides not requested. Negative indices count from the last slide"""
+        package_rels = self._xml_rels_for(PACKAGE_URI)
+        main_rel = next(rel for rel in package_rels if rel.reltype == RT.OFFICE_DOCUMENT)
+        main_partname = PackURI.from_rel_ref(PACKAGE_URI.baseURI, main_rel.target_ref)
+        main_rels = {rel.rId: rel for rel in self._xml_rels_for(main_partname)}
+
+        presentation = etree.fromstring(self._package_reader[main_partname])
+        slide_rIds = presentation.xpath(
+            "./p:sldIdLst/p:sldId/@r:id",
+            namespaces={
+                "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+                "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+            },
+        )
+        total = len(slide_rIds)
+        slide_indices = {i % total for i in _check_slide_indices(self._slide_indices, total)}
+        return {
+            PackURI.from_rel_ref(main_partname.baseURI, main_rels[rId].target_ref)
+            for i, rId in enumerate(slide_rIds)
+            if i not in slide_indices
+        }
+
+    @lazyproperty
+    def _xml_rels(self):
+        xml_rels = {}
+        # Skipped slides are never visited, so parts only they use are not read either
+        visited_partnames = set(self._skipped_slides)
+
+        def load_rels(source_partname, rels):
+            xml_rels[source_partname] = rels
+            visited_partnames.add(source_partname)
+            base_uri = source_partname.baseURI
+            for rel in rels:
+                if rel.targetMode == RTM.EXTERNAL:
+                    continue
+                target_partname = PackURI.from_rel_ref(base_uri, rel.target_ref)
+                if target_partname in visited_partnames:
+                    continue
+                load_rels(target_partname, self._xml_rels_for(target_partname))
+
+        load_rels(PACKAGE_URI, self._xml_rels_for(PACKAGE_URI))
+        return xml_rels
+
+
+def _check_slide_indices(slide_indices, total):
+    for i in slide_indices:
+        if not -total <= i < total:
+            raise IndexError(f"slide index {i} out of range for {total} slides")
+    return slide_indices
+
+
+def slide_count(pkg_file):
+    """Returns number of slides of a .pptx package, reading only its presentation part"""
+    with zipfile.ZipFile(pkg_file) as zipf:
+        package_rels = etree.fromstring(zipf.read("_rels/.rels"))
+        main_ref = next(
+            rel.get("Target") for rel in package_rels if rel.get("Type") == RT.OFFICE_DOCUMENT
+        )
+        presentation = etree.fromstring(zipf.read(main_ref.lstrip("/")))
+    return len(presentation.xpath(
+        "./p:sldIdLst/p:sldId",
+        namespaces={"p": "http://schemas.openxmlformats.org/presentationml/2006/main"},
+    ))
+
+
+def open_slides(pkg_file, slide_indices):
+    """
+    Opens presentation with only the slides at `slide_indices`, in their original order. 
+    Negative indices count from the last slide, and IndexError is raised for indices out of range.
+    Parts used by other slides only, e.g. their media, are left unread in the zip package, so 
+    memory and load time depend on the slides requested rather than on the size of the file.
+    Relationships to skipped slides, e.g. slide jump hyperlinks, are dropped together with the 
+    elements referring to them.
+
+    :param pkg_file: path or file object of a .pptx package
+    :param slide_indices: indices of slides to load
+    :return: Presentation
+    """
+    package = Package(pkg_file)
+    loader = _PartialPackageLoader(pkg_file, package, slide_indices)
+    try:
+        pkg_xml_rels, parts = loader._load()
+    finally:
+        loader._package_reader._blob_reader.close()
+    package._rels.load_from_xml(PACKAGE_URI, pkg_xml_rels, parts)
+
+    # Relationships to skipped slides were not loaded, so remove what refers to them, e.g. slide 
+    # list entries of skipped slides and slide jump hyperlinks
+    for partname, part in parts.items():
+        if not isinstance(part, XmlPart):
+            continue
+        rIds = {rel.rId for rel in _object_rels(part)}
+        for rel in loader._xml_rels.get(partname, ()):
+            if rel.rId not in rIds:
+                _remove_rel_references(part._element, rel.rId)
+    return package.main_document_part.presentation
+
+
+### SLIDE PROTOTYPES
+import re
+import hashlib
+
+from pptx.opc.package import PartFactory, _Relationship
+
+# Parts that copies of a part can keep pointing at instead of cloning
+SHARED_PART_RELTYPES = (
+    RT.IMAGE,
+    RT.MEDIA,
+    RT.VIDEO,
+    RT.AUDIO,
+    RT.SLIDE,
+    RT.SLIDE_LAYOUT,
+)
+# Embedded objects are shared between copies of a slide, as in `duplicate_slide`
+SHARED_SLIDE_RELTYPES = SHARED_PART_RELTYPES + (RT.OLE_OBJECT, RT.PACKAGE)
+
+
+def _add_rel_with_rId(rels, rId, reltype, target, is_external=False):
+    """Adds relationship keeping the given rId, so XML referring to it needs no remapping"""
+    rels._rels[rId] = _Relationship(
+        rels._base_uri,
+        rId,
+        reltype,
+        target_mode=RTM.EXTERNAL if is_external else RTM.INTERNAL,
+        target=target,
+    )
+
+
+class _PartSnapshot(object):
+    """Serialized part and its relationships, loaded again as a new part on every copy"""
+
+    def __init__(self, part, shared_reltypes=SHARED_PART_RELTYPES, skipped_reltypes=()):
+        # e.g. "/ppt/charts/chart3.xml" -> "/ppt/charts/chart%d.xml"
+        self.partname_template = re.sub(r"\d*(\.\w+)$", r"%d\1", part.partname)
+        self.content_type = part.content_type
+        self.blob = part.blob
+        self.rels = _snapshot_rels(part, shared_reltypes, skipped_reltypes)
+        self._intern_key = None
+        # Parsed XML of XML parts, from the first load on
+        self._element = None
+
+    def __getstate__(self):
+        # Parsed XML cannot be pickled, and is parsed again after unpickling
+        state = self.__dict__.copy()
+        state["_element"] = None
+        return state
+
+    def load(self, package, part_cache=None):
+        """Returns new part in `package` loaded from the snapshot"""
+        partname = package.next_partname(self.partname_template)
+        part_cls = PartFactory._part_cls_for(self.content_type)
+        if issubclass(part_cls, XmlPart):
+            # Copying the parsed element is cheaper than parsing the blob for every copy
+            if self._element is None:
+                self._element = parse_xml(self.blob)
+            part = part_cls(partname, self.content_type, package, copy.deepcopy(self._element))
+        else:
+            part = part_cls.load(partname, self.content_type, package, self.blob)
+        _load_rels(part, self.rels, package, part_cache)
+        return part
+
+    def load_interned(self, package):
+        """Same as `load`, reusing part of the package with identical content if any"""
+        interner = part_interner(package)
+        if self._intern_key is None:
+            self._intern_key = interner.key(self.content_type, self.blob)
+        part = interner.get(self._intern_key)
+        if part is None:
+            part = interner.add(self.load(package), self._intern_key)
+        return part
+
+    def load_cached(self, package, part_cache):
+        """Same as `load`, reusing part with identical content from `part_cache` dict if any"""
+        key = (self.content_type, hashlib.sha1(self.blob).hexdigest())
+        if key not in part_cache:
+            part_cache[key] = self.load(package, part_cache)
+        return part_cache[key]
+
+
+def _snapshot_rels(part, shared_reltypes, skipped_reltypes=()):
+    """
+    Returns list of (rId, reltype, target, is_external) for relationships of `part`.
+    Targets not of a shared type are captured as a |_PartSnapshot| to be cloned later.
+    """
+    rels = []
+    for rel in _object_rels(part):
+        if rel.reltype in skipped_reltypes:
+            continue
+        if rel.is_external:
+            rels.append((rel.rId, rel.reltype, rel.target_ref, True))
+        elif rel.reltype in shared_reltypes:
+            rels.append((rel.rId, rel.reltype, rel.target_part, False))
+        else:
+            target = _PartSnapshot(
+                rel.target_part,
+                tuple(r for r in shared_reltypes if r in SHARED_PART_RELTYPES),
+                skipped_reltypes,
+            )
+            rels.append((rel.rId, rel.reltype, target, False))
+    return rels
+
+
+def _load_rels(part, snapshot_rels, package, part_cache=None):
+    """
+    Adds relationships from `snapshot_rels` to `part`, loading snapshot targets as new parts. 
+    If `part_cache` dict is given, media that can be shared is only loaded once per content
+    """
+    for rId, reltype, target, is_external in snapshot_rels:
+        if isinstance(target, _PartSnapshot):
+            if part_cache is not None and reltype in SHARED_PART_RELTYPES:
+                target = target.load_cached(package, part_cache)
+            elif reltype in INTERNED_RELTYPES and not target.rels:
+                target = target.load_interned(package)
+            else:
+                target = target.load(package, part_cache)
+        _add_rel_with_rId(part.rels, rId, reltype, target, is_external)
+
+
+class SlidePrototype(object):
+    """
+    Compiled copy of a slide: its XML, relationships and notes text are captured once, so 
+    copies can be stamped out with a deepcopy of the slide element instead of copying 
+    each shape.
+
+    Images, media and OLE objects are shared with the source slide, other related parts 
+    (e.g. charts with their workbooks) are cloned for every copy. All rIds are kept as 
+    they are in the source slide and the whole shape tree is copied, so neither rIds nor
+    shape ids need remapping.
+    """
+
+    def __init__(self, slide, shape_index=None):
+        from pptx.slide import Slide
+
+        self.package = slide.part.package
+        self.element = copy.deepcopy(slide.part._element)
+        # Index of the copied shape tree, from which indexes of stamped slides are derived
+        prototype_slide = Slide(self.element, slide.part)
+        if shape_index is not None:
+            self.shape_index = shape_index.copy_for(prototype_slide)
+        else:
+            self.shape_index = ShapeIndex(prototype_slide)
+        self.rels = _snapshot_rels(
+            slide.part, SHARED_SLIDE_RELTYPES, skipped_reltypes=(RT.NOTES_SLIDE,)
+        )
+        self.notes_text = None
+        if slide.has_notes_slide:
+            self.notes_text = slide.notes_slide.notes_text_frame.text
+
+    def new_slide_part(self, partname):
+        """Returns new slide part with given partname, not yet related to the presentation"""
+        from pptx.parts.slide import SlidePart
+
+        slide_part = SlidePart(
+            partname, CT.PML_SLIDE, self.package, copy.deepcopy(self.element)
+        )
+        _load_rels(slide_part, self.rels, self.package)
+        return slide_part
+
+    def fill_notes(self, slide):
+        if self.notes_text is not None:
+            slide.notes_slide.notes_text_frame.text = self.notes_text
+
+
+class SlidePayload(object):
+    """
+    Self-contained copy of a slide for moving it between presentations, e.g. from a worker
+    process. Holds the slide XML, notes text and snapshots of every related part (media, 
+    charts, embeddings) with no references to the source package, so it can be pickled.
+
+    Copies land on the destination's layout given to `new_slide_part`. Links to other 
+    slides of the source presentation cannot be kept and are removed.
+    """
+
+    SKIPPED_RELTYPES = (RT.SLIDE_LAYOUT, RT.NOTES_SLIDE, RT.SLIDE)
+
+    def __init__(self, slide):
+        element = copy.deepcopy(slide.part._element)
+        self.layout_rId = None
+        for rel in _object_rels(slide.part):
+            if rel.reltype == RT.SLIDE_LAYOUT:
+                self.layout_rId = rel.rId
+            elif rel.reltype == RT.SLIDE and not rel.is_external:
+                # Remove jumps to slides of the source presentation
+                for el in element.xpath(".//*[@r:id='%s']" % rel.rId):
+                    el.getparent().remove(el)
+
+        self.blob = etree.tostring(element)
+        self.rels = _snapshot_rels(slide.part, (), self.SKIPPED_RELTYPES)
+        self.notes_text = None
+        if slide.has_notes_slide:
+            self.notes_text = slide.notes_slide.notes_text_frame.text
+
+    def new_slide_part(self, partname, package, slide_layout, part_cache=None):
+        """
+        Returns new slide part in `package` with given partname and layout, not yet related to 
+        the presentation. Identical media across payloads is stored once if `part_cache` is given
+        """
+        from pptx.parts.slide import SlidePart
+
+        slide_part = SlidePart.load(partname, CT.PML_SLIDE, package, self.blob)
+        _load_rels(slide_part, self.rels, package, part_cache)
+        layout_rId = self.layout_rId or slide_part.rels._next_rId
+        _add_rel_with_rId(slide_part.rels, layout_rId, RT.SLIDE_LAYOUT, slide_layout.part)
+        return slide_part
+
+    def fill_notes(self, slide):
+        if self.notes_text is not None:
+            slide.notes_slide.notes_text_frame.text = self.notes_text
+
+
+### SLIDE IMPORT
+import weakref
+
+_R_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_SLD_LAYOUT_ID_LST = "{http://schemas.openxmlformats.org/presentationml/2006/main}sldLayoutIdLst"
+
+# Attributes of the root element left out of fingerprints, e.g. the random id stamped on themes
+# by `clone_slide_master` and on chart styles by `clone_chart`
+FINGERPRINT_IGNORED_ATTRIBUTES = {
+    CT.OFC_THEME: ("id",),
+    CT.OFC_CHART_STYLE: ("id",),
+    CT.OFC_CHART_COLORS: ("id",),
+}
+# Children of the root element left out of fingerprints. Masters are compared without their
+# list of layouts, which are imported one by one
+FINGERPRINT_SKIPPED_TAGS = {
+    CT.PML_SLIDE_MASTER: (_SLD_LAYOUT_ID_LST,),
+}
+
+
+def _canonical_xml(element, rel_keys=None, ignored_attributes=(), skipped_tags=()):
+    """
+    Returns canonical (C14N) serialization of `element`, with values of r:id, r:embed and other
+    relationship attributes replaced by their value in `rel_keys`, the given attributes of the
+    root left out and children of the root with the given tags removed
+    """
+    element = copy.deepcopy(element)
+    for name in ignored_attributes:
+        element.attrib.pop(name, None)
+    for child in [child for child in element if child.tag in skipped_tags]:
+        element.remove(child)
+    if rel_keys:
+        for el in element.iter(etree.Element):
+            for name, value in el.attrib.items():
+                if name.startswith(_R_NS) and value in rel_keys:
+                    el.set(name, rel_keys[value])
+    return etree.tostring(element, method="c14n")
+
+
+class SlideImporter(object):
+    """
+    Copies slides together with the closure of their relationships into `package`, from the 
+    same or another presentation. The slide XML is copied whole and every rId is kept, so no 
+    shape needs rebuilding and no reference needs remapping.
+
+    Images, media and embedded objects are imported once: later slides using the same source 
+    part, or a part with identical content, point at the part already imported. Within the same 
+    package they are shared with the source slide. Charts, diagrams and other parts that belong 
+    to a single slide are copied for every slide, with their own related parts.
+
+    Slide layouts and masters from another presentation are matched by fingerprint, a hash of
+    their canonical XML and of what their relationships point to (themes, media). A layout
+    identical to one already in the package is reused, only new layouts and masters are cloned
+    """
+
+    def __init__(self, package):
+        self.package = package
+        # Source part -> part imported into the package
+        self._imported = weakref.WeakKeyDictionary()
+        # (content type, hash of content) -> part imported into the package
+        self._by_content = {}
+        # Part -> fingerprint, for masters, layouts and their related parts
+        self._fingerprints = weakref.WeakKeyDictionary()
+        # Fingerprint -> master or layout of the package, indexed on first import
+        self._layout_index = None
+
+    def import_slide(self, slide, partname, slide_layout=None):
+        """
+        Returns new slide part with given partname holding a copy of `slide`, not yet related to 
+        the presentation. The copy uses `slide_layout` if given, else the layout of `slide` as
+        returned by `import_layout`. Links to slides of another presentation cannot be kept and 
+        are removed
+        """
+        from pptx.parts.slide import SlidePart
+
+        if slide_layout is None:
+            slide_layout = self.import_layout(slide.slide_layout)
+
+        source = slide.part
+        element = copy.deepcopy(source._element)
+        slide_part = SlidePart(partname, CT.PML_SLIDE, self.package, element)
+        # Parts the slide XML no longer refers to are left behind
+        unreferenced = {rel.rId for rel in _unreferenced_rels(source)}
+        layout_rId = None
+        for rel in _object_rels(source):
+            if rel.rId in unreferenced:
+                continue
+            elif rel.reltype == RT.SLIDE_LAYOUT:
+                layout_rId = rel.rId
+            elif rel.reltype == RT.NOTES_SLIDE:
+                continue
+            elif rel.reltype == RT.SLIDE and not rel.is_external and source.package is not self.package:
+                # Remove jumps to slides of the source presentation
+                _remove_rel_references(element, rel.rId)
+            else:
+                self._import_rel(slide_part, rel, SHARED_SLIDE_RELTYPES)
+
+        layout_rId = layout_rId or slide_part.rels._next_rId
+        _add_rel_with_rId(slide_part.rels, layout_rId, RT.SLIDE_LAYOUT, slide_layout.part)
+        return slide_part
+
+    def import_layout(self, slide_layout):
+        """
+        Returns layout of the package identical to `slide_layout`, cloning it first, with its
+        slide master and theme unless an identical master exists, if there is none
+        """
+        return self._import_master_part(slide_layout.part, self._add_slide_layout).slide_layout
+
+    def import_slide_master(self, slide_master):
+        """Returns slide master of the package identical to `slide_master`, cloning it if there is none"""
+        return self._import_master_part(slide_master.part, self._add_slide_master).slide_master
+
+    def _import_master_part(self, part, add_part):
+        if part.package is self.package:
+            return part
+        imported = self._imported.get(part)
+        if imported is None:
+            if self._layout_index is None:
+                self._layout_index = self._index_layouts()
+            fingerprint = self._fingerprint(part)
+            imported = self._layout_index.get(fingerprint)
+            if imported is None:
+                imported = self._layout_index[fingerprint] = add_part(part)
+                METRICS.count("import_layout.cloned")
+            else:
+                METRICS.count("import_layout.reused")
+            self._imported[part] = imported
+        return imported
+
+    def _index_layouts(self):
+        index = {}
+        for slide_master in self.package.presentation_part.presentation.slide_masters:
+            index.setdefault(self._fingerprint(slide_master.part), slide_master.part)
+            for slide_layout in slide_master.slide_layouts:
+                index.setdefault(self._fingerprint(slide_layout.part), slide_layout.part)
+        return index
+
+    def _fingerprint(self, part):
+        """
+        Returns hash of the canonical XML of `part` and of what its relationships point to, equal
+        for identical parts whatever their partnames and rIds. Related XML parts are hashed the
+        same way, other parts by content. Masters are hashed without their layouts
+        """
+        fingerprint = self._fingerprints.get(part)
+        if fingerprint is not None:
+            return fingerprint
+
+        rel_keys = {}
+        for rel in _object_rels(part):
+            if rel.reltype in (RT.SLIDE_LAYOUT, RT.SLIDE) and not rel.is_external:
+                continue
+            if rel.is_external:
+                key = rel.target_ref
+            elif isinstance(rel.target_part, XmlPart):
+                key = self._fingerprint(rel.target_part)
+            else:
+                key = hashlib.sha1(rel.target_part.blob).hexdigest()
+            rel_keys[rel.rId] = "%s %s" % (rel.reltype, key)
+
+        digest = hashlib.sha1(part.content_type.encode())
+        if isinstance(part, XmlPart):
+            digest.update(_canonical_xml(
+                part._element,
+                rel_keys,
+                FINGERPRINT_IGNORED_ATTRIBUTES.get(part.content_type, ()),
+                FINGERPRINT_SKIPPED_TAGS.get(part.content_type, ()),
+            ))
+        else:
+            digest.update(part.blob)
+        # Relationships not referred to from the XML count too, e.g. the theme of a master
+        for key in sorted(rel_keys.values()):
+            digest.update(key.encode())
+        fingerprint = self._fingerprints[part] = digest.hexdigest()
+        return fingerprint
+
+    def _add_slide_master(self, part):
+        """Clones slide master with its theme into the package, without any of its layouts"""
+        new_part = self._copy_part(part, skipped_reltypes=(RT.SLIDE_LAYOUT,))
+        for sldLayoutIdLst in new_part._element.findall(_SLD_LAYOUT_ID_LST):
+            for sldLayoutId in list(sldLayoutIdLst):
+                sldLayoutIdLst.remove(sldLayoutId)
+
+        presentation = self.package.presentation_part.presentation
+        rId = presentation.part.relate_to(new_part, RT.SLIDE_MASTER)
+        sel_id = _new_existing_slide_ml_id(presentation)
+        el_ref = presentation.slide_masters._sldMasterIdLst._add_sldMasterId()
+        el_ref.set("id", str(sel_id))
+        el_ref.set(_R_NS + "id", rId)
+        return new_part
+
+    def _add_slide_layout(self, part):
+        """Clones slide layout into the package, under the imported copy of its master"""
+        new_part = self._copy_part(part)
+        master_part = new_part.part_related_by(RT.SLIDE_MASTER)
+
+        rId = master_part.relate_to(new_part, RT.SLIDE_LAYOUT)
+        sel_id = _new_existing_slide_ml_id(self.package.presentation_part.presentation)
+        el_ref = master_part._element.get_or_add_sldLayoutIdLst()._add_sldLayoutId()
+        el_ref.set("id", str(sel_id))
+        el_ref.set(_R_NS + "id", rId)
+        return new_part
+
+    def _import_rel(self, part, rel, shared_reltypes):
+        if rel.is_external:
+            _add_rel_with_rId(part.rels, rel.rId, rel.reltype, rel.target_ref, is_external=True)
+            return
+        target = rel.target_part
+        if rel.reltype == RT.SLIDE_MASTER:
+            target = self._import_master_part(target, self._add_slide_master)
+        elif rel.reltype in INTERNED_RELTYPES and not _object_rels(target):
+            target = self._import_interned(target)
+        elif rel.reltype in shared_reltypes:
+            target = self._import_shared(target)
+        else:
+            target = self._copy_part(target)
+        _add_rel_with_rId(part.rels, rel.rId, rel.reltype, target)
+
+    def _import_shared(self, part):
+        if part.package is self.package:
+            return part
+        imported = self._imported.get(part)
+        if imported is None:
+            key = (part.content_type, hashlib.sha1(part.blob).hexdigest())
+            imported = self._by_content.get(key)
+            if imported is None:
+                imported = self._by_content[key] = self._copy_part(part)
+            self._imported[part] = imported
+        return imported
+
+    def _import_interned(self, part):
+        imported = self._imported.get(part)
+        if imported is None:
+            interner = part_interner(self.package)
+            key = interner.key(part.content_type, part.blob)
+            imported = interner.get(key)
+            if imported is None:
+                # Within the package the source part itself is shared
+                copied = part if part.package is self.package else self._copy_part(part)
+                imported = interner.add(copied, key)
+            self._imported[part] = imported
+        return imported
+
+    def _copy_part(self, part, skipped_reltypes=()):
+        """Returns copy of part in the package, with copies or shared imports of its related parts"""
+        # e.g. "/ppt/charts/chart3.xml" -> "/ppt/charts/chart%d.xml"
+        partname = self.package.next_partname(re.sub(r"\d*(\.\w+)$", r"%d\1", part.partname))
+        if isinstance(part, XmlPart):
+            new_part = type(part)(partname, part.content_type, self.package, copy.deepcopy(part._element))
+        else:
+            new_part = PartFactory(partname, part.content_type, self.package, part.blob)
+
+        unreferenced = set()
+        if part.content_type in (CT.PML_SLIDE_LAYOUT, CT.PML_SLIDE_MASTER):
+            unreferenced = {rel.rId for rel in _unreferenced_rels(part)}
+        for rel in _object_rels(part):
+            if rel.reltype in skipped_reltypes or rel.rId in unreferenced:
+                continue
+            if rel.reltype == RT.SLIDE and not rel.is_external and part.package is not self.package:
+                continue
+            # Parts related to a copied part, e.g. the workbook of a chart, are only shared if media
+            self._import_rel(new_part, rel, SHARED_PART_RELTYPES)
+        return new_part
+
+
+### PART INTERNING
+CHART_STYLE_RELTYPE = "http://schemas.microsoft.com/office/2011/relationships/chartStyle"
+
+# Parts that copies of masters and charts share when their content is the same
+INTERNED_CONTENT_TYPES = (CT.OFC_THEME, CT.OFC_CHART_STYLE, CT.OFC_CHART_COLORS)
+INTERNED_RELTYPES = (RT.THEME, CHART_STYLE_RELTYPE, RT.CHART_COLOR_STYLE)
+
+
+class PartInterner(object):
+    """
+    Index of the theme, chart style and chart colors parts of a package by content, so that
+    copies of masters and charts reuse an identical part instead of adding one more.
+    Parts are compared by canonical XML without the random `id` stamped on their root.
+    Parts with relationships of their own, e.g. themes with images, are never interned
+    """
+
+    def __init__(self, package):
+        self._parts = {}
+        for part in package.iter_parts():
+            if part.content_type in INTERNED_CONTENT_TYPES and not _object_rels(part):
+                self._parts.setdefault(self.key(part.content_type, part.blob), part)
+
+    @staticmethod
+    def key(content_type, blob):
+        ignored_attributes = FINGERPRINT_IGNORED_ATTRIBUTES.get(content_type, ())
+        xml = _canonical_xml(etree.fromstring(blob), ignored_attributes=ignored_attributes)
+        return content_type, hashlib.sha1(xml).hexdigest()
+
+    def get(self, key):
+        """Returns part of the package with the given key, or None"""
+        part = self._parts.get(key)
+        METRICS.count("intern.reused" if part is not None else "intern.missed")
+        return part
+
+    def add(self, part, key=None):
+        """Indexes part added to the package, and returns it"""
+        key = key or self.key(part.content_type, part.blob)
+        return self._parts.setdefault(key, part)
+
+
+def part_interner(obj):
+    """Returns the |PartInterner| of the package of `obj`, creating it on first use"""
+    package = _package_of(obj)
+    interner = getattr(package, "_part_interner", None)
+    if interner is None:
+        interner = package._part_interner = PartInterner(package)
+    return interner
+
+
+### SHAPE INDEX
+from collections import defaultdict, namedtuple
+
+from pptx.enum.shapes import PP_PLACEHOLDER
+
+TITLE_PLACEHOLDER_TYPES = (
+    PP_PLACEHOLDER.TITLE,
+    PP_PLACEHOLDER.CENTER_TITLE,
+    PP_PLACEHOLDER.VERTICAL_TITLE,
+)
+
+_ShapeEntry = namedtuple(
+    "_ShapeEntry", ["element", "name", "shape_type", "placeholder_type", "has_text_frame"]
+)
+
+
+class ShapeIndex(object):
+    """
+    Index of the top-level shapes of a slide by name, shape type and placeholder role, with an
+    allocator of shape ids. The shape tree is scanned once when the index is built, after which
+    ids are handed out from a counter, where `slide.shapes._next_shape_id` rescans the whole
+    tree for every id. Code changing the shape tree keeps the index up to date with `add` and
+    `remove`
+    """
+
+    def __init__(self, slide):
+        shapes = slide.shapes
+        used_ids = [int(id_str) for id_str in shapes._spTree.xpath("//@id") if id_str.isdigit()]
+        self._reset(shapes, max(used_ids, default=0) + 1)
+        for shape in shapes:
+            self.add(shape)
+
+    def _reset(self, shapes, next_id):
+        self._shapes = shapes
+        # Next free shape id
+        self.next_id = next_id
+        # Shape element -> entry, in shape tree order
+        self._entries = {}
+        # Shape element -> shape object, created on first lookup
+        self._proxies = {}
+        self._by_name = defaultdict(list)
+        self._by_type = defaultdict(list)
+        self._by_placeholder_type = defaultdict(list)
+
+    def allocate(self, count=1):
+        """Returns first of `count` consecutive unused shape ids"""
+        shape_id = self.next_id
+        self.next_id += count
+        return shape_id
+
+    def add(self, shape):
+        """Indexes shape added to the slide"""
+        try:
+            shape_type = shape.shape_type
+        except NotImplementedError:
+            shape_type = None
+        placeholder_type = shape.placeholder_format.type if shape.is_placeholder else None
+        self._add_entry(_ShapeEntry(
+            shape._element, shape.name, shape_type, placeholder_type, shape.has_text_frame
+        ))
+        self._proxies[shape._element] = shape
+
+    def _add_entry(self, entry):
+        self._entries[entry.element] = entry
+        self._by_name[entry.name].append(entry.element)
+        self._by_type[entry.shape_type].append(entry.element)
+        self._by_placeholder_type[entry.placeholder_type].append(entry.element)
+
+    def remove(self, shape):
+        """Drops shape removed from the slide from the index"""
+        entry = self._entries.pop(shape._element, None)
+        if entry is None:
+            return
+        self._proxies.pop(entry.element, None)
+        self._by_name[entry.name].remove(entry.element)
+        self._by_type[entry.shape_type].remove(entry.element)
+        self._by_placeholder_type[entry.placeholder_type].remove(entry.element)
+
+    def is_current(self):
+        """True if the index holds exactly the shapes now in the shape tree, in the same order"""
+        return list(self._entries) == list(self._shapes._spTree.iter_shape_elms())
+
+    def _shape(self, element):
+        shape = self._proxies.get(element)
+        if shape is None:
+            shape = self._proxies[element] = self._shapes._shape_factory(element)
+        return shape
+
+    @property
+    def shapes(self):
+        return [self._shape(element) for element in self._entries]
+
+    def named(self, name):
+        return [self._shape(element) for element in self._by_name.get(name, ())]
+
+    def of_type(self, shape_type):
+        return [self._shape(element) for element in self._by_type.get(shape_type, ())]
+
+    def placeholder(self, *placeholder_types):
+        """Returns first placeholder of one of the given types, or None"""
+        for placeholder_type in placeholder_types:
+            if self._by_placeholder_type.get(placeholder_type):
+                return self._shape(self._by_placeholder_type[placeholder_type][0])
+        return None
+
+    @staticmethod
+    def _is_title(entry):
+        return entry.placeholder_type in TITLE_PLACEHOLDER_TYPES or "Title" in entry.name
+
+    def title_shape(self):
+        """Returns first shape with a text frame that is a title placeholder or named as a title"""
+        for entry in self._entries.values():
+            if entry.has_text_frame and self._is_title(entry):
+                return self._shape(entry.element)
+        return None
+
+    def content_shape(self):
+        """Returns first shape with a text frame that is not the title"""
+        for entry in self._entries.values():
+            if entry.has_text_frame and not self._is_title(entry):
+                return self._shape(entry.element)
+        return None
+
+    def copy_for(self, slide):
+        """
+        Returns index of `slide`, a copy of the indexed slide with the same shape tree, without
+        scanning the copy. Shapes are matched by their position in the shape tree. If the indexed 
+        slide changed outside the index, the copy is scanned instead
+        """
+        if not self.is_current():
+            return ShapeIndex(slide)
+        positions = {element: i for i, element in enumerate(self._shapes._spTree)}
+        elements = list(slide.shapes._spTree)
+        if len(elements) != len(positions):
+            # Not a copy of the slide as indexed
+            return ShapeIndex(slide)
+        index = ShapeIndex.__new__(ShapeIndex)
+        index._reset(slide.shapes, self.next_id)
+        for element, entry in self._entries.items():
+            index._add_entry(entry._replace(element=elements[positions[element]]))
+        return index
+
+
+### TEXT MEASUREMENT
+from functools import lru_cache
+
+# Runs of spaces and the words between them, for wrapping
+WRAP_TOKENS = re.compile(r"\s+|\S+")
+
+
+class _AdvanceTable(dict):
+    """Glyph advance widths of a font, filled on first use of each character"""
+
+    def __init__(self, font):
+        super().__init__()
+        self.font = font
+
+    def __missing__(self, char):
+        advance = self[char] = self.font.getlength(char)
+        return advance
+
+
+class FontMetrics(object):
+    """
+    Measures text in pixels for a PIL font by adding up cached glyph advances, without drawing.
+    Kerning is ignored, so widths can differ slightly from rendered text. 
+    Use `font_metrics` to share instances per font file and size
+    """
+
+    def __init__(self, font):
+        self.font = font
+        self.advances = _AdvanceTable(font)
+        self.ascent, self.descent = font.getmetrics()
+        # Distance between lines as laid out by `ImageDraw.multiline_text`, without spacing
+        self.line_advance = font.getbbox("A")[3]
+
+    def width(self, text):
+        return sum(map(self.advances.__getitem__, text))
+
+    def widths(self, texts):
+        """Returns width of each string in `texts`"""
+        advances = self.advances.__getitem__
+        return [sum(map(advances, text)) for text in texts]
+
+    def wrap(self, text, max_width):
+        """Splits text into lines no wider than `max_width`, breaking at spaces where possible"""
+        lines = []
+        for paragraph in text.split("\n"):
+            lines.extend(self._wrap_paragraph(paragraph, max_width))
+        return lines
+
+    def _wrap_paragraph(self, paragraph, max_width):
+        starts = self.line_starts(paragraph, max_width)
+        ends = starts[1:] + [len(paragraph)]
+        return [paragraph[start:end].strip() for start, end in zip(starts, ends)]
+
+    def line_starts(self, paragraph, max_width):
+        """
+        Returns offsets in `paragraph` at which its lines start when wrapped to `max_width`, 
+        breaking at spaces where possible. The first line starts at 0
+        """
+        starts = [0]
+        line_empty, line_width = True, 0
+        for match in WRAP_TOKENS.finditer(paragraph):
+            token = match.group()
+            token_width = self.width(token)
+            if token.isspace():
+                # Spaces only count if followed by a word on the same line
+                if not line_empty:
+                    line_width += token_width
+                continue
+            if not line_empty and line_width + token_width > max_width:
+                starts.append(match.start())
+                line_empty, line_width = True, 0
+            if token_width > max_width:
+                # Word longer than a line: break it between characters
+                for offset, char in enumerate(token, match.start()):
+                    char_width = self.advances[char]
+                    if not line_empty and line_width + char_width > max_width:
+                        starts.append(offset)
+                        line_width = 0
+                    line_empty = False
+                    line_width += char_width
+            else:
+                line_empty = False
+                line_width += token_width
+        return starts
+
+    def lines_height(self, line_count, line_spacing=4):
+        if line_count == 0:
+            return 0
+        return (line_count - 1) * (self.line_advance + line_spacing) + self.ascent + self.descent
+
+    def text_box_size(self, text, max_width=None, line_spacing=4):
+        """Returns (width, height) of text, wrapped to `max_width` if given"""
+        lines = self.wrap(text, max_width) if max_width is not None else text.split("\n")
+        return max(self.widths(lines), default=0), self.lines_height(len(lines), line_spacing)
+
+
+@lru_cache(maxsize=64)
+def _cached_font_metrics(font_file, size, index=0):
+    from PIL import ImageFont
+
+    return FontMetrics(ImageFont.truetype(font_file, size, index=index))
+
+
+def font_metrics(font, size=None):
+    """
+    Returns FontMetrics for a PIL font, or for a font file and size in pixels, shared between 
+    calls for the same font file and size
+    """
+    if size is not None:
+        return _cached_font_metrics(font, size)
+    path = getattr(font, "path", None)
+    if isinstance(path, (str, bytes)):
+        return _cached_font_metrics(path, font.size, getattr(font, "index", 0))
+    # Fonts not loaded from a file cannot be keyed, so are measured without sharing the cache
+    return FontMetrics(font)
+
+
+# Text frame insets PowerPoint uses when bodyPr does not set them: left, top, right, bottom
+DEFAULT_INSETS = {"lIns": 91440, "tIns": 45720, "rIns": 91440, "bIns": 45720}
+
+TextFrameGeometry = namedtuple(
+    "TextFrameGeometry", ["width", "height", "font_size", "line_spacing", "space_before"]
+)
+
+
+_TEXT_NS = {
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+}
+
+
+def _xpath(element, path):
+    # Elements of some parts are plain lxml elements, without the namespace map of `BaseOxmlElement`
+    return etree._Element.xpath(element, path, namespaces=_TEXT_NS)
+
+
+def _first_value(elements, path, default=None):
+    for element in elements:
+        values = _xpath(element, path)
+        if values:
+            return values[0]
+    return default
+
+
+def text_frame_geometry(shape):
+    """
+    Returns TextFrameGeometry of the text frame of shape: size inside the insets, font size and 
+    spacing before paragraphs as Length, and line spacing as a float of lines or a Length, like 
+    `_Paragraph.line_spacing`. Values not set on the shape are inherited from its layout and master 
+    placeholders, then from the text styles of the slide master
+
+    :param shape: shape on a slide, e.g. the content placeholder of a template slide
+    :return:
+    """
+    from pptx.util import Emu, Pt
+
+    # Shape, then placeholders it inherits from
+    chain = [shape._element]
+    base = shape
+    while getattr(base, "_base_placeholder", None) is not None:
+        base = base._base_placeholder
+        chain.append(base._element)
+
+    # First level paragraph properties, most specific first
+    paragraph_props = []
+    for i, element in enumerate(chain):
+        if i == 0:
+            paragraph_props.extend(_xpath(element, "./p:txBody/a:p[1]/a:pPr"))
+        paragraph_props.extend(_xpath(element, "./p:txBody/a:lstStyle/a:lvl1pPr"))
+    try:
+        style = "p:bodyStyle" if shape.is_placeholder else "p:otherStyle"
+        master = shape.part.slide_layout.slide_master
+        paragraph_props.extend(_xpath(master._element, f"./p:txStyles/{style}/a:lvl1pPr"))
+    except AttributeError:
+        pass
+
+    insets = {
+        name: int(_first_value(chain, f"./p:txBody/a:bodyPr/@{name}", default))
+        for name, default in DEFAULT_INSETS.items()
+    }
+    width = shape.width - insets["lIns"] - insets["rIns"]
+    height = shape.height - insets["tIns"] - insets["bIns"]
+
+    font_size = int(_first_value(paragraph_props, "./a:defRPr/@sz", 1800)) / 100
+    font_scale = _first_value(chain[:1], "./p:txBody/a:bodyPr/a:normAutofit/@fontScale")
+    if font_scale is not None:
+        font_size = font_size * int(font_scale) / 100000
+
+    line_spacing = 1.0
+    spacing = _first_value(paragraph_props, "./a:lnSpc/a:*")
+    if spacing is not None:
+        if spacing.tag.endswith("spcPts"):
+            line_spacing = Pt(int(spacing.get("val")) / 100)
+        else:
+            line_spacing = int(spacing.get("val")) / 100000
+
+    space_before = Pt(0)
+    spacing = _first_value(paragraph_props, "./a:spcBef/a:*")
+    if spacing is not None:
+        if spacing.tag.endswith("spcPts"):
+            space_before = Pt(int(spacing.get("val")) / 100)
+        else:
+            space_before = Pt(font_size * int(spacing.get("val")) / 100000)
+
+    return TextFrameGeometry(Emu(width), Emu(height), Pt(font_size), line_spacing, space_before)
+
+
 ### EXPERIMENTS ON TEXT SIZE
 
 
@@ -803,6 +2480,7 @@ def estimate_text_box_size(
     print("Computed in pixels (w, h)")
     print((width + right_margin + left_margin, height + top_margin + bottom_margin))
 
+    Measures with the cached glyph advances of `font_metrics(font)`.
 
     :param txt:
     :param font:
@@ -810,35 +2488,4 @@ def estimate_text_box_size(
     :param line_spacing:
     :return:
     """
-
-    from PIL import ImageDraw, Image
-
-    image = Image.new(size=(400, 300), mode="RGB")
-    draw = ImageDraw.Draw(image)
-    emu_per_inch = 914400
-    px_per_inch = 72.0
-    pt_per_pixel = 0.75
-
-    fontsize_pt = 12
-    # font = ImageFont.truetype("arial.ttf", int(fontsize_pt / pt_per_pixel))
-    import textwrap, math
-
-    if max_width is not None:
-        actual_txt = []
-        for line in txt.split("\n"):
-            _, _, width, h = font.getbbox(line)
-            split_at = len(line) // math.ceil(width / max_width)
-            actual_txt = actual_txt + textwrap.wrap(line, width=split_at)
-
-        new_lines = len(actual_txt)
-        actual_txt = "\n".join(actual_txt)
-    else:
-        actual_txt = txt
-        new_lines = 0
-
-    left, top, right, bottom = draw.multiline_textbbox(
-        (0, 0), actual_txt, font=font, spacing=line_spacing
-    )
-    ascent, descent = font.getmetrics()
-
-    return right - left, bottom  # + descent * new_lines
\ No newline at end of file
+    return font_metrics(font).text_box_size(txt, max_width, line_spacing)
\ No newline at end of file